@@ -6,8 +6,8 @@ import sys
 
 # Import our custom modules
 from image_preprocessor import ImagePreprocessor
-from ocr_engine import OCREngine
-from text_processor import TextProcessor
+from ocr_engine import get_ocr_engine, MIN_SCRIPT_CONFIDENCE
+from text_processor import get_text_processor
 import utils
 from ui_helpers import display_export_options, display_translation_options, display_tts_options, display_structured_data, display_text_analysis
 
@@ -67,12 +67,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'ocr_results' not in st.session_state:
-    st.session_state.ocr_results = None
-if 'processed_image' not in st.session_state:
-    st.session_state.processed_image = None
-if 'original_image' not in st.session_state:
-    st.session_state.original_image = None
+st.session_state.setdefault('ocr_results', None)
+st.session_state.setdefault('detected_script', {})
 
 # Initialize components
 @st.cache_resource
@@ -80,12 +76,41 @@ def load_components():
     """Load and cache OCR components"""
     return {
         'preprocessor': ImagePreprocessor(),
-        'ocr_engine': OCREngine(),
-        'text_processor': TextProcessor()
+        'ocr_engine': get_ocr_engine(),
+        'text_processor': get_text_processor()
     }
 
 components = load_components()
 
+# Script detection results kept per session (oldest dropped first)
+MAX_DETECTED_SCRIPTS = 64
+
+# Languages listed first in the language dropdown
+COMMON_LANGUAGES = ('eng', 'fra', 'deu', 'spa', 'ita', 'por', 'rus', 'chi_sim', 'jpn', 'kor', 'ara', 'hin')
+
+@st.cache_data(show_spinner=False)
+def build_language_options(available_languages):
+    """
+    Build the language dropdown entries once per set of installed languages
+    
+    Args:
+        available_languages: Tuple of installed Tesseract language codes
+        
+    Returns:
+        Tuple of (name -> code options with common languages first,
+        (lowercase name, lowercase code, name, code) search index)
+    """
+    ocr_engine = components['ocr_engine']
+    language_options = {ocr_engine.get_language_name(lang): lang for lang in available_languages}
+    
+    common_options = {ocr_engine.get_language_name(lang): lang
+                      for lang in COMMON_LANGUAGES if lang in language_options.values()}
+    other_options = {name: code for name, code in language_options.items()
+                     if code not in COMMON_LANGUAGES}
+    
+    search_index = tuple((name.lower(), code.lower(), name, code) for name, code in language_options.items())
+    return {**common_options, **other_options}, search_index
+
 def main():
     """Main application function"""
     
@@ -99,27 +124,23 @@ def main():
         st.subheader("🌍 Language")
         available_languages = components['ocr_engine'].get_available_languages()
         
-        # Create language options with search functionality
-        language_options = {}
-        for lang in available_languages:
-            lang_name = components['ocr_engine'].get_language_name(lang)
-            language_options[lang_name] = lang
+        # Language options are built once and reused across reruns
+        language_options, search_index = build_language_options(tuple(available_languages))
         
         # Add search box for languages
         search_term = st.text_input("🔍 Search languages:", placeholder="Type to search...")
         
         # Filter languages based on search
         if search_term:
-            filtered_options = {name: code for name, code in language_options.items() 
-                              if search_term.lower() in name.lower() or search_term.lower() in code.lower()}
+            term = search_term.lower()
+            filtered_options = {name: code for lower_name, lower_code, name, code in search_index
+                                if term in lower_name or term in lower_code}
+            if not filtered_options:
+                st.caption("No matching languages, showing all.")
+                filtered_options = language_options
         else:
-            # Show most common languages first, then all others
-            common_languages = ['eng', 'fra', 'deu', 'spa', 'ita', 'por', 'rus', 'chi_sim', 'jpn', 'kor', 'ara', 'hin']
-            common_options = {components['ocr_engine'].get_language_name(lang): lang 
-                            for lang in common_languages if lang in available_languages}
-            other_options = {name: code for name, code in language_options.items() 
-                           if code not in common_languages}
-            filtered_options = {**common_options, **other_options}
+            # Most common languages first, then all others
+            filtered_options = language_options
         
         selected_language = st.selectbox(
             "Select OCR Language",
@@ -152,6 +173,16 @@ def main():
         with st.expander("Advanced Options"):
             enable_contrast = st.checkbox("Enhance Contrast", value=False)
             enable_noise_removal = st.checkbox("Remove Background Noise", value=False)
+            enable_hq_denoise = st.checkbox(
+                "High-quality Denoise",
+                value=False,
+                help="Edge-preserving bilateral filter instead of a fast Gaussian blur (slower)"
+            )
+            enable_script_check = st.checkbox(
+                "Check Script Matches Language",
+                value=False,
+                help="Warn when a page's script does not fit the selected language (extra detection pass per page)"
+            )
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -160,97 +191,123 @@ def main():
         st.header("📤 Upload Image")
         
         # File uploader
-        uploaded_file = st.file_uploader(
-            "Choose an image file",
+        uploaded_files = st.file_uploader(
+            "Choose image files",
             type=['png', 'jpg', 'jpeg', 'bmp', 'tiff', 'tif', 'webp'],
-            help="Upload an image containing text to extract"
+            accept_multiple_files=True,
+            help="Upload one or more images (multi-page TIFFs are split into pages) containing text to extract"
         )
         
-        if uploaded_file is not None:
-            # Validate file
-            if not utils.validate_image_file(uploaded_file):
-                utils.create_error_message("Invalid file format or size. Please upload a valid image file (max 10MB).")
-                return
-            
-            # Load image
-            original_image = utils.load_image(uploaded_file)
-            if original_image is None:
-                return
+        if uploaded_files:
+            pages = []
+            for uploaded_file in uploaded_files:
+                # Validate file
+                if not utils.validate_image_file(uploaded_file):
+                    utils.create_error_message(f"Invalid file format or size for {uploaded_file.name}. Please upload a valid image file (max 10MB).")
+                    return
+                
+                # Load every page of the image
+                file_pages = utils.load_image_pages(uploaded_file)
+                if not file_pages:
+                    return
+                
+                for page_number, page in enumerate(file_pages, 1):
+                    label = uploaded_file.name if len(file_pages) == 1 else f"{uploaded_file.name} (page {page_number})"
+                    pages.append((label, page))
             
-            st.session_state.original_image = original_image
+            original_images = [page for _, page in pages]
             
-            # Display original image
-            st.subheader("📷 Original Image")
-            st.image(original_image, caption=f"Uploaded: {uploaded_file.name}", use_column_width=True)
+            # Display original images
+            st.subheader("📷 Original Image" if len(pages) == 1 else f"📷 Original Images ({len(pages)} pages)")
+            for label, page in pages:
+                st.image(utils.make_display_image(page), caption=f"Uploaded: {label}", use_column_width=True)
             
             # Image information
-            image_info = utils.get_image_info(original_image)
-            utils.create_metadata_display(image_info)
+            if len(pages) == 1:
+                image_info = utils.get_image_info(original_images[0])
+                utils.create_metadata_display(image_info)
             
             # Process button
             if st.button("🚀 Extract Text", type="primary"):
-                process_image(original_image, ocr_language, confidence_threshold,
+                process_image(original_images, ocr_language, confidence_threshold,
                             enable_grayscale, enable_denoise, enable_threshold, 
-                            enable_deskew, enable_resize, enable_contrast, enable_noise_removal)
+                            enable_deskew, enable_resize, enable_contrast, enable_noise_removal,
+                            enable_hq_denoise, enable_script_check)
     
     # Remove the col2 Quick Info section entirely
 
-def process_image(original_image, ocr_language, confidence_threshold,
+def process_image(original_images, ocr_language, confidence_threshold,
                  enable_grayscale, enable_denoise, enable_threshold, 
-                 enable_deskew, enable_resize, enable_contrast, enable_noise_removal):
-    """Process image and extract text"""
+                 enable_deskew, enable_resize, enable_contrast, enable_noise_removal,
+                 enable_hq_denoise=False, enable_script_check=False):
+    """Process one or more images (pages) and extract text"""
     
     # Create progress bar
     progress_bar = st.progress(0)
     status_text = st.empty()
     
     try:
-        # Step 1: Preprocess image
+        # Step 1: Preprocess images
         utils.show_processing_progress(progress_bar, 1, 5, "Preprocessing image...")
         
         preprocessing_options = {
             'grayscale': enable_grayscale,
             'denoise': enable_denoise,
+            'high_quality_denoise': enable_hq_denoise,
             'threshold': enable_threshold,
             'deskew': enable_deskew,
             'resize': enable_resize
         }
         
-        processed_image = components['preprocessor'].preprocess_image(
-            original_image, preprocessing_options
-        )
-        
-        # Apply additional preprocessing if enabled
-        if enable_contrast:
-            processed_image = components['preprocessor'].enhance_contrast(processed_image)
-        
-        if enable_noise_removal:
-            processed_image = components['preprocessor'].remove_background_noise(processed_image)
-        
-        st.session_state.processed_image = processed_image
+        processed_images = []
+        for original_image in original_images:
+            processed_image = components['preprocessor'].preprocess_image(
+                original_image, preprocessing_options
+            )
+            
+            # Apply additional preprocessing if enabled
+            if enable_contrast:
+                processed_image = components['preprocessor'].enhance_contrast(processed_image)
+            
+            if enable_noise_removal:
+                processed_image = components['preprocessor'].remove_background_noise(processed_image)
+            
+            processed_images.append(processed_image)
         
-        # Step 2: Display processed image
+        # Step 2: Display processed images
         utils.show_processing_progress(progress_bar, 2, 5, "Displaying processed image...")
         
         st.subheader(" Processed Image")
-        utils.create_comparison_view(original_image, processed_image)
+        for original_image, processed_image in zip(original_images, processed_images):
+            utils.create_comparison_view(original_image, processed_image)
         
         # Step 3: Extract text
         utils.show_processing_progress(progress_bar, 3, 5, "Extracting text...")
         
-        # Use appropriate extraction method based on config
-        ocr_results = components['ocr_engine'].extract_text(
-            processed_image, 
-            language=ocr_language,
-            confidence_threshold=confidence_threshold
-        )
+        if enable_script_check:
+            check_detected_script(processed_images, ocr_language)
+        
+        if len(processed_images) == 1:
+            ocr_results = components['ocr_engine'].extract_text(
+                processed_images[0], 
+                language=ocr_language,
+                confidence_threshold=confidence_threshold
+            )
+        else:
+            # OCR all pages concurrently and merge them into one result
+            page_results = components['ocr_engine'].extract_text_batch(
+                processed_images,
+                language=ocr_language,
+                confidence_threshold=confidence_threshold
+            )
+            ocr_results = components['ocr_engine'].combine_results(page_results)
         
         st.session_state.ocr_results = ocr_results
         
         # Step 4: Display results
         utils.show_processing_progress(progress_bar, 4, 5, "Displaying results...")
         
-        display_ocr_results(ocr_results, processed_image)
+        display_ocr_results(ocr_results, processed_images[0])
         
         # Step 5: Complete
         utils.show_processing_progress(progress_bar, 5, 5, "Processing complete!")
@@ -263,6 +320,35 @@ def process_image(original_image, ocr_language, confidence_threshold,
         progress_bar.empty()
         status_text.empty()
 
+def check_detected_script(processed_images, ocr_language, min_confidence=MIN_SCRIPT_CONFIDENCE):
+    """Warn when a page's detected script does not match the selected OCR language"""
+    
+    ocr_engine = components['ocr_engine']
+    
+    for page_number, processed_image in enumerate(processed_images, start=1):
+        # Script detection runs once per image; reruns reuse the stored result
+        detected_scripts = st.session_state.detected_script
+        image_key = utils.get_image_hash(processed_image)
+        detected = detected_scripts.get(image_key)
+        if detected is None:
+            detected = ocr_engine.detect_script(processed_image)
+            # Failures are not stored, so the next run tries again
+            if detected is not None:
+                while len(detected_scripts) >= MAX_DETECTED_SCRIPTS:
+                    del detected_scripts[next(iter(detected_scripts))]
+                detected_scripts[image_key] = detected
+        
+        if detected is None or detected['script_confidence'] < min_confidence:
+            continue
+        
+        if not ocr_engine.script_matches_language(detected['script'], ocr_language):
+            page_label = f"Page {page_number}: " if len(processed_images) > 1 else ""
+            suggested = ocr_engine.get_language_name(detected['language'])
+            st.warning(
+                f"{page_label}The image looks like {detected['script']} script, which does not match "
+                f"the selected language. Consider switching the OCR language to {suggested}."
+            )
+
 def display_ocr_results(ocr_results, processed_image):
     """Display OCR results and additional features"""
     
@@ -317,13 +403,9 @@ def display_ocr_results(ocr_results, processed_image):
             display_text_analysis(extracted_text, ocr_results, components)
         
         # Display bounding boxes if available
-        if ocr_results.get('bounding_boxes'):
+        if ocr_results.get('box_text'):
             st.header("📍 Text Detection Visualization")
-            ocr_boxes = components['ocr_engine'].extract_text_with_boxes(
-                processed_image, 
-                language=ocr_results['language']
-            )
-            utils.display_image_with_boxes(processed_image, ocr_boxes)
+            utils.display_image_with_boxes(processed_image, ocr_results)
     
     else:
         utils.create_warning_message("No text was detected in the image. Try adjusting the preprocessing options or confidence threshold.")
@@ -1,164 +1,368 @@
+import functools
+import io
+import os
+import re
+import shlex
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
 import pytesseract
 import cv2
 import numpy as np
 from PIL import Image
 import streamlit as st
 from typing import Dict, List, Tuple, Optional
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import utils
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Parallelism comes from running several Tesseract jobs at once; keep each one single-threaded
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+# zlib level for the temporary PNGs handed to Tesseract; they are read once and deleted
+PNG_COMPRESS_LEVEL = 1
+
+# Images per Tesseract process in batch mode; bounds the cost of one failed or slow run
+BATCH_CHUNK_SIZE = 50
+
+# In-process Tesseract handles kept loaded at once (tesserocr backend); least recently used go first
+MAX_TESS_APIS = 8
+
+def _empty_box_arrays():
+    """Empty per-word box arrays for results without detected words"""
+    return {
+        'box_x': np.empty(0, np.int32),
+        'box_y': np.empty(0, np.int32),
+        'box_w': np.empty(0, np.int32),
+        'box_h': np.empty(0, np.int32),
+        'box_conf': np.empty(0, np.float32),
+        'box_text': []
+    }
+
+def _save_png(image, path):
+    """Write an image as a PNG for Tesseract to read, favouring encode speed over file size"""
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    image.save(path, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+
+def _split_batch(images, max_workers):
+    """Split images into even chunks, one per worker, of at most BATCH_CHUNK_SIZE images"""
+    chunk_count = max(min(max_workers, len(images)), -(-len(images) // BATCH_CHUNK_SIZE))
+    size, extra = divmod(len(images), chunk_count)
+    chunks = []
+    start = 0
+    for i in range(chunk_count):
+        end = start + size + (i < extra)
+        chunks.append(images[start:end])
+        start = end
+    return chunks
+
+def _line_starts(box_y, box_h):
+    """
+    Indices of the words that start a new line
+    
+    A word starts a new line when its top is more than half the line
+    height away from the top of the line's first word (the line height is
+    that first word's height), so a slowly drifting baseline still breaks.
+    """
+    starts = []
+    anchor_y = anchor_h = 0
+    for i, (y, h) in enumerate(zip(box_y.tolist(), box_h.tolist())):
+        if not starts or abs(y - anchor_y) > anchor_h * 0.5:
+            starts.append(i)
+            anchor_y, anchor_h = y, h
+    return starts or [0]
+
+def _error_result(language, config, error):
+    """Result dictionary for a failed OCR call"""
+    return {
+        'text': '',
+        'lines': [],
+        'confidence': 0,
+        'confidence_scores': np.empty(0, np.uint8),
+        **_empty_box_arrays(),
+        'language': language,
+        'config': config,
+        'success': False,
+        'error': str(error)
+    }
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _extract_text_cached(image_key, language, config, confidence_threshold, _engine, _image):
+    """Run OCR, memoized on the image hash and OCR settings (failures are not cached)"""
+    return _engine._extract_text(_image, language, config, confidence_threshold)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _extract_text_batch_cached(image_keys, language, config, confidence_threshold, max_workers, _engine, _images):
+    """Run batched OCR, memoized on the page hashes and OCR settings"""
+    return _engine._extract_text_batch(_images, language, config, confidence_threshold, max_workers)
+
+
+@functools.lru_cache(maxsize=1)
+def _installed_languages():
+    """Installed Tesseract languages; fixed for the life of the process (failures are not cached)"""
+    if TESSEROCR_AVAILABLE:
+        return tuple(tesserocr.get_languages()[1])
+    return tuple(pytesseract.get_languages())
+
+# Complete language mapping for all 125+ Tesseract languages
+SUPPORTED_LANGUAGES = MappingProxyType({
+    'afr': 'Afrikaans',
+    'amh': 'Amharic',
+    'ara': 'Arabic',
+    'asm': 'Assamese',
+    'aze': 'Azerbaijani',
+    'aze_cyrl': 'Azerbaijani (Cyrillic)',
+    'bel': 'Belarusian',
+    'ben': 'Bengali',
+    'bod': 'Tibetan',
+    'bos': 'Bosnian',
+    'bre': 'Breton',
+    'bul': 'Bulgarian',
+    'cat': 'Catalan',
+    'ceb': 'Cebuano',
+    'ces': 'Czech',
+    'chi_sim': 'Chinese (Simplified)',
+    'chi_sim_vert': 'Chinese (Simplified, Vertical)',
+    'chi_tra': 'Chinese (Traditional)',
+    'chi_tra_vert': 'Chinese (Traditional, Vertical)',
+    'chr': 'Cherokee',
+    'cos': 'Corsican',
+    'cym': 'Welsh',
+    'dan': 'Danish',
+    'deu': 'German',
+    'div': 'Dhivehi',
+    'dzo': 'Dzongkha',
+    'ell': 'Greek',
+    'enm': 'English (Middle)',
+    'eng': 'English',
+    'epo': 'Esperanto',
+    'equ': 'Math/Equation',
+    'est': 'Estonian',
+    'eus': 'Basque',
+    'fao': 'Faroese',
+    'fas': 'Persian',
+    'fil': 'Filipino',
+    'fin': 'Finnish',
+    'fra': 'French',
+    'frk': 'German (Frankish)',
+    'frm': 'French (Middle)',
+    'fry': 'Frisian',
+    'gla': 'Scottish Gaelic',
+    'gle': 'Irish',
+    'glg': 'Galician',
+    'grc': 'Greek (Ancient)',
+    'guj': 'Gujarati',
+    'hat': 'Haitian Creole',
+    'heb': 'Hebrew',
+    'hin': 'Hindi',
+    'hrv': 'Croatian',
+    'hun': 'Hungarian',
+    'hye': 'Armenian',
+    'iku': 'Inuktitut',
+    'ind': 'Indonesian',
+    'isl': 'Icelandic',
+    'ita': 'Italian',
+    'ita_old': 'Italian (Old)',
+    'jav': 'Javanese',
+    'jpn': 'Japanese',
+    'jpn_vert': 'Japanese (Vertical)',
+    'kan': 'Kannada',
+    'kat': 'Georgian',
+    'kat_old': 'Georgian (Old)',
+    'kaz': 'Kazakh',
+    'khm': 'Khmer',
+    'kir': 'Kyrgyz',
+    'kmr': 'Kurdish (Kurmanji)',
+    'kor': 'Korean',
+    'kor_vert': 'Korean (Vertical)',
+    'lao': 'Lao',
+    'lat': 'Latin',
+    'lav': 'Latvian',
+    'lit': 'Lithuanian',
+    'ltz': 'Luxembourgish',
+    'mal': 'Malayalam',
+    'mar': 'Marathi',
+    'mkd': 'Macedonian',
+    'mlt': 'Maltese',
+    'mon': 'Mongolian',
+    'mri': 'Maori',
+    'msa': 'Malay',
+    'mya': 'Burmese',
+    'nep': 'Nepali',
+    'nld': 'Dutch',
+    'nor': 'Norwegian',
+    'oci': 'Occitan',
+    'osd': 'Orientation and Script Detection',
+    'pan': 'Punjabi',
+    'pol': 'Polish',
+    'por': 'Portuguese',
+    'pus': 'Pashto',
+    'que': 'Quechua',
+    'ron': 'Romanian',
+    'rus': 'Russian',
+    'san': 'Sanskrit',
+    'sin': 'Sinhala',
+    'slk': 'Slovak',
+    'slv': 'Slovenian',
+    'snd': 'Sindhi',
+    'spa': 'Spanish',
+    'spa_old': 'Spanish (Old)',
+    'sqi': 'Albanian',
+    'srp': 'Serbian',
+    'srp_latn': 'Serbian (Latin)',
+    'sun': 'Sundanese',
+    'swa': 'Swahili',
+    'swe': 'Swedish',
+    'syr': 'Syriac',
+    'tam': 'Tamil',
+    'tat': 'Tatar',
+    'tel': 'Telugu',
+    'tgk': 'Tajik',
+    'tha': 'Thai',
+    'tir': 'Tigrinya',
+    'ton': 'Tongan',
+    'tur': 'Turkish',
+    'uig': 'Uyghur',
+    'ukr': 'Ukrainian',
+    'urd': 'Urdu',
+    'uzb': 'Uzbek',
+    'uzb_cyrl': 'Uzbek (Cyrillic)',
+    'vie': 'Vietnamese',
+    'yid': 'Yiddish',
+    'yor': 'Yoruba'
+})
+
+# Shared by all the paragraph/document presets
+_PARAGRAPH_CONFIG = '--oem 3 --psm 6 -c preserve_interword_spaces=1'
+
+# OCR configuration options - optimized for long paragraphs and documents
+OCR_CONFIGS = MappingProxyType({
+    'default': '--oem 3 --psm 6',
+    'paragraphs': _PARAGRAPH_CONFIG,
+    'long_paragraphs': _PARAGRAPH_CONFIG,
+    'document': _PARAGRAPH_CONFIG,
+    'single_line': '--oem 3 --psm 7',
+    'single_word': '--oem 3 --psm 8',
+    'single_char': '--oem 3 --psm 10',
+    'sparse_text': '--oem 3 --psm 11',
+    'sparse_text_osd': '--oem 3 --psm 12',
+    'raw_line': '--oem 3 --psm 13',
+    'uniform_block': '--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
+    'numbers_only': '--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789',
+    'letters_only': '--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
+    'long_text': _PARAGRAPH_CONFIG,
+    'academic': _PARAGRAPH_CONFIG,
+    'newspaper': _PARAGRAPH_CONFIG,
+    'handwritten': _PARAGRAPH_CONFIG
+})
+
+# Tesseract OSD script names and the languages written in them (first is the suggestion).
+# Languages not listed under any script are treated as Latin.
+SCRIPT_LANGUAGES = MappingProxyType({
+    'Arabic': ('ara', 'fas', 'urd', 'pus', 'snd', 'uig', 'kmr'),
+    'Armenian': ('hye',),
+    'Bengali': ('ben', 'asm'),
+    'Cyrillic': ('rus', 'ukr', 'bel', 'bul', 'mkd', 'srp', 'kaz', 'kir', 'mon', 'tat', 'tgk', 'aze_cyrl', 'uzb_cyrl'),
+    'Devanagari': ('hin', 'mar', 'nep', 'san'),
+    'Ethiopic': ('amh', 'tir'),
+    'Georgian': ('kat', 'kat_old'),
+    'Greek': ('ell', 'grc'),
+    'Gujarati': ('guj',),
+    'Gurmukhi': ('pan',),
+    'Han': ('chi_sim', 'chi_tra', 'chi_sim_vert', 'chi_tra_vert'),
+    'Hangul': ('kor', 'kor_vert'),
+    'Hebrew': ('heb', 'yid'),
+    'Japanese': ('jpn', 'jpn_vert'),
+    'Kannada': ('kan',),
+    'Khmer': ('khm',),
+    'Lao': ('lao',),
+    'Malayalam': ('mal',),
+    'Myanmar': ('mya',),
+    'Sinhala': ('sin',),
+    'Tamil': ('tam',),
+    'Telugu': ('tel',),
+    'Thaana': ('div',),
+    'Thai': ('tha',),
+    'Tibetan': ('bod', 'dzo')
+})
+
+# OSD script confidence below which the detected script is ignored
+MIN_SCRIPT_CONFIDENCE = 2.0
+
+# Word-level Tesseract output, one record per detected word
+_WORD_DTYPE = np.dtype([
+    ('conf', np.float32),
+    ('text', object),
+    ('left', np.int32),
+    ('top', np.int32),
+    ('width', np.int32),
+    ('height', np.int32)
+])
+
+# Paragraph formatting patterns
+_SENTENCE_END = re.compile(r'[.!?]$')
+_WHITESPACE_RUN = re.compile(r'\s+')
+_BLANK_LINE_RUN = re.compile(r'\n{3,}')
+
 
 class OCREngine:
     """
     Core OCR engine using Tesseract for text extraction
     """
     
-    def __init__(self):
-        # Complete language mapping for all 125+ Tesseract languages
-        self.supported_languages = {
-            'afr': 'Afrikaans',
-            'amh': 'Amharic',
-            'ara': 'Arabic',
-            'asm': 'Assamese',
-            'aze': 'Azerbaijani',
-            'aze_cyrl': 'Azerbaijani (Cyrillic)',
-            'bel': 'Belarusian',
-            'ben': 'Bengali',
-            'bod': 'Tibetan',
-            'bos': 'Bosnian',
-            'bre': 'Breton',
-            'bul': 'Bulgarian',
-            'cat': 'Catalan',
-            'ceb': 'Cebuano',
-            'ces': 'Czech',
-            'chi_sim': 'Chinese (Simplified)',
-            'chi_sim_vert': 'Chinese (Simplified, Vertical)',
-            'chi_tra': 'Chinese (Traditional)',
-            'chi_tra_vert': 'Chinese (Traditional, Vertical)',
-            'chr': 'Cherokee',
-            'cos': 'Corsican',
-            'cym': 'Welsh',
-            'dan': 'Danish',
-            'deu': 'German',
-            'div': 'Dhivehi',
-            'dzo': 'Dzongkha',
-            'ell': 'Greek',
-            'enm': 'English (Middle)',
-            'eng': 'English',
-            'epo': 'Esperanto',
-            'equ': 'Math/Equation',
-            'est': 'Estonian',
-            'eus': 'Basque',
-            'fao': 'Faroese',
-            'fas': 'Persian',
-            'fil': 'Filipino',
-            'fin': 'Finnish',
-            'fra': 'French',
-            'frk': 'German (Frankish)',
-            'frm': 'French (Middle)',
-            'fry': 'Frisian',
-            'gla': 'Scottish Gaelic',
-            'gle': 'Irish',
-            'glg': 'Galician',
-            'grc': 'Greek (Ancient)',
-            'guj': 'Gujarati',
-            'hat': 'Haitian Creole',
-            'heb': 'Hebrew',
-            'hin': 'Hindi',
-            'hrv': 'Croatian',
-            'hun': 'Hungarian',
-            'hye': 'Armenian',
-            'iku': 'Inuktitut',
-            'ind': 'Indonesian',
-            'isl': 'Icelandic',
-            'ita': 'Italian',
-            'ita_old': 'Italian (Old)',
-            'jav': 'Javanese',
-            'jpn': 'Japanese',
-            'jpn_vert': 'Japanese (Vertical)',
-            'kan': 'Kannada',
-            'kat': 'Georgian',
-            'kat_old': 'Georgian (Old)',
-            'kaz': 'Kazakh',
-            'khm': 'Khmer',
-            'kir': 'Kyrgyz',
-            'kmr': 'Kurdish (Kurmanji)',
-            'kor': 'Korean',
-            'kor_vert': 'Korean (Vertical)',
-            'lao': 'Lao',
-            'lat': 'Latin',
-            'lav': 'Latvian',
-            'lit': 'Lithuanian',
-            'ltz': 'Luxembourgish',
-            'mal': 'Malayalam',
-            'mar': 'Marathi',
-            'mkd': 'Macedonian',
-            'mlt': 'Maltese',
-            'mon': 'Mongolian',
-            'mri': 'Maori',
-            'msa': 'Malay',
-            'mya': 'Burmese',
-            'nep': 'Nepali',
-            'nld': 'Dutch',
-            'nor': 'Norwegian',
-            'oci': 'Occitan',
-            'osd': 'Orientation and Script Detection',
-            'pan': 'Punjabi',
-            'pol': 'Polish',
-            'por': 'Portuguese',
-            'pus': 'Pashto',
-            'que': 'Quechua',
-            'ron': 'Romanian',
-            'rus': 'Russian',
-            'san': 'Sanskrit',
-            'sin': 'Sinhala',
-            'slk': 'Slovak',
-            'slv': 'Slovenian',
-            'snd': 'Sindhi',
-            'spa': 'Spanish',
-            'spa_old': 'Spanish (Old)',
-            'sqi': 'Albanian',
-            'srp': 'Serbian',
-            'srp_latn': 'Serbian (Latin)',
-            'sun': 'Sundanese',
-            'swa': 'Swahili',
-            'swe': 'Swedish',
-            'syr': 'Syriac',
-            'tam': 'Tamil',
-            'tat': 'Tatar',
-            'tel': 'Telugu',
-            'tgk': 'Tajik',
-            'tha': 'Thai',
-            'tir': 'Tigrinya',
-            'ton': 'Tongan',
-            'tur': 'Turkish',
-            'uig': 'Uyghur',
-            'ukr': 'Ukrainian',
-            'urd': 'Urdu',
-            'uzb': 'Uzbek',
-            'uzb_cyrl': 'Uzbek (Cyrillic)',
-            'vie': 'Vietnamese',
-            'yid': 'Yiddish',
-            'yor': 'Yoruba'
-        }
+    __slots__ = ('supported_languages', 'ocr_configs', 'script_languages', '_tess_apis', '_tess_lock')
+    
+    def __init__(self, preload_languages=()):
+        """
+        Args:
+            preload_languages: Language codes whose models are loaded in a
+                background thread right away (tesserocr backend only), so the
+                first request does not pay the model-load cost
+        """
+        # Shared read-only tables (module constants, not rebuilt per engine)
+        self.supported_languages = SUPPORTED_LANGUAGES
+        self.ocr_configs = OCR_CONFIGS
+        self.script_languages = SCRIPT_LANGUAGES
         
-        # OCR configuration options - optimized for long paragraphs and documents
-        self.ocr_configs = {
-            'default': '--oem 3 --psm 6',
-            'paragraphs': '--oem 3 --psm 6 -c preserve_interword_spaces=1',
-            'long_paragraphs': '--oem 3 --psm 6 -c preserve_interword_spaces=1',
-            'document': '--oem 3 --psm 6 -c preserve_interword_spaces=1',
-            'single_line': '--oem 3 --psm 7',
-            'single_word': '--oem 3 --psm 8',
-            'single_char': '--oem 3 --psm 10',
-            'sparse_text': '--oem 3 --psm 11',
-            'sparse_text_osd': '--oem 3 --psm 12',
-            'raw_line': '--oem 3 --psm 13',
-            'uniform_block': '--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
-            'numbers_only': '--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789',
-            'letters_only': '--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
-            'long_text': '--oem 3 --psm 6 -c preserve_interword_spaces=1',
-            'academic': '--oem 3 --psm 6 -c preserve_interword_spaces=1',
-            'newspaper': '--oem 3 --psm 6 -c preserve_interword_spaces=1',
-            'handwritten': '--oem 3 --psm 6 -c preserve_interword_spaces=1'
-        }
+        # In-process Tesseract handles (tesserocr), kept warm across calls.
+        # One handle per (language, oem, -c variables) since variables persist on a handle;
+        # each has its own lock, so different languages recognize concurrently.
+        # _tess_lock only guards the handle table.
+        self._tess_apis = OrderedDict()
+        self._tess_lock = threading.Lock()
+        
+        if preload_languages and TESSEROCR_AVAILABLE:
+            threading.Thread(target=self.warm_up, args=(preload_languages,), daemon=True).start()
+    
+    def warm_up(self, languages=('eng',), config='default'):
+        """
+        Load the models for the given languages by recognizing a blank image
+        
+        Only the tesserocr backend keeps models between calls, so this is a
+        no-op for the subprocess backend.
+        
+        Args:
+            languages: Language codes to preload
+            config: OCR configuration preset whose handle should be warmed
+        """
+        if not TESSEROCR_AVAILABLE:
+            return
+        
+        ocr_config = self.ocr_configs.get(config, self.ocr_configs['default'])
+        blank = Image.new('L', (32, 32), 255)
+        for language in languages:
+            try:
+                self._image_to_data(blank, language, ocr_config)
+            except Exception:
+                continue
     
     def extract_text(self, image, language='eng', config='default', confidence_threshold=60):
         """
@@ -174,93 +378,394 @@ class OCREngine:
             Dictionary containing extracted text and metadata
         """
         try:
-            # Convert PIL Image to numpy array if needed
-            if isinstance(image, Image.Image):
-                image = np.array(image)
+            # PIL images are handed to Tesseract as-is; only the hash reads their pixels
+            # Identical images and settings reuse the cached OCR result
+            return _extract_text_cached(
+                utils.get_image_hash(image), language, config, confidence_threshold, self, image
+            )
             
-            # Get OCR configuration
-            ocr_config = self.ocr_configs.get(config, self.ocr_configs['default'])
+        except Exception as e:
+            return _error_result(language, config, e)
+    
+    def _extract_text(self, image, language, config, confidence_threshold):
+        """Run Tesseract on a numpy or PIL image and group the words into lines"""
+        # Get OCR configuration
+        ocr_config = self.ocr_configs.get(config, self.ocr_configs['default'])
+        
+        # Extract text with confidence scores
+        data = self._image_to_data(image, language, ocr_config)
+        
+        return self._build_result(data, language, config, confidence_threshold)
+    
+    def _build_result(self, data, language, config, confidence_threshold):
+        """Group Tesseract word data (pytesseract DICT layout) into lines and a result dictionary"""
+        words = self._words_array(data)
+        
+        # Keep confident, non-empty words (Tesseract emits them in reading order)
+        kept = words[(words['conf'] > confidence_threshold) & (words['text'] != '')]
+        
+        box_text = kept['text'].tolist()
+        box_conf = np.ascontiguousarray(kept['conf'])
+        box_x = np.ascontiguousarray(kept['left'])
+        box_y = np.ascontiguousarray(kept['top'])
+        box_w = np.ascontiguousarray(kept['width'])
+        box_h = np.ascontiguousarray(kept['height'])
+        
+        bounds = _line_starts(box_y, box_h) + [len(box_text)]
+        extracted_text = [
+            ' '.join(box_text[start:end]) for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+        ]
+        
+        # Join lines with proper paragraph breaks
+        full_text = self._join_paragraphs(extracted_text)
+        
+        # Calculate overall confidence
+        avg_confidence = float(box_conf.mean()) if len(box_conf) else 0
+        # Tesseract confidences are 0-100, so one byte per word is enough
+        confidence_scores = np.rint(np.clip(box_conf, 0, 100)).astype(np.uint8)
+        
+        return {
+            'text': full_text,
+            'lines': extracted_text,
+            'confidence': avg_confidence,
+            'confidence_scores': confidence_scores,
+            # Word boxes as parallel arrays (one entry per kept word)
+            'box_x': box_x,
+            'box_y': box_y,
+            'box_w': box_w,
+            'box_h': box_h,
+            'box_conf': box_conf,
+            'box_text': box_text,
+            'language': language,
+            'config': config,
+            'success': True
+        }
+    
+    @staticmethod
+    def _words_array(data):
+        """Repack the parallel DICT column lists into one _WORD_DTYPE structured array (text stripped)"""
+        words = np.empty(len(data['conf']), dtype=_WORD_DTYPE)
+        words['conf'] = data['conf']
+        # Callers test emptiness with one vectorized mask on this column; a list
+        # comprehension strips faster than np.char.strip, which round-trips via a fixed-width array
+        words['text'] = [text.strip() for text in data['text']]
+        for field in ('left', 'top', 'width', 'height'):
+            words[field] = data[field]
+        return words
+    
+    def _image_to_data(self, image, language, ocr_config):
+        """
+        Run Tesseract and return word-level data in pytesseract's DICT layout
+        
+        Uses the in-process tesserocr API when it is installed, so the
+        language model stays loaded between calls; otherwise falls back to
+        the pytesseract subprocess wrapper.
+        
+        Args:
+            image: Input image (numpy array, PIL Image or image file path)
+            language: Language code for OCR
+            ocr_config: Tesseract command-line configuration string
             
-            # Extract text with confidence scores
-            data = pytesseract.image_to_data(
-                image, 
-                lang=language, 
-                config=ocr_config,
-                output_type=pytesseract.Output.DICT
+        Returns:
+            Dictionary with 'text', 'conf', 'left', 'top', 'width' and 'height' lists
+        """
+        if not TESSEROCR_AVAILABLE:
+            if isinstance(image, str):
+                return pytesseract.image_to_data(
+                    image, 
+                    lang=language, 
+                    config=ocr_config,
+                    output_type=pytesseract.Output.DICT
+                )
+            
+            # Encode the input ourselves with fast PNG compression (pytesseract uses the default level)
+            with tempfile.TemporaryDirectory(prefix='ocr_') as temp_dir:
+                path = os.path.join(temp_dir, 'image.png')
+                _save_png(image, path)
+                return self._image_to_data(path, language, ocr_config)
+        
+        oem, psm, variables = self._parse_config(ocr_config)
+        if isinstance(image, str):
+            image = Image.open(image)
+        elif not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        
+        data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+        level = tesserocr.RIL.WORD
+        
+        # A handle is not thread-safe, so recognition on one handle is serialized
+        api, api_lock = self._get_tess_api(language, oem, variables)
+        with api_lock:
+            api.SetPageSegMode(psm)
+            api.SetImage(image)
+            api.Recognize()
+            
+            iterator = api.GetIterator()
+            if iterator is not None:
+                for word in tesserocr.iterate_level(iterator, level):
+                    text = word.GetUTF8Text(level)
+                    box = word.BoundingBox(level)
+                    if text is None or box is None:
+                        continue
+                    x1, y1, x2, y2 = box
+                    data['text'].append(text)
+                    data['conf'].append(word.Confidence(level))
+                    data['left'].append(x1)
+                    data['top'].append(y1)
+                    data['width'].append(x2 - x1)
+                    data['height'].append(y2 - y1)
+            
+            api.Clear()
+        
+        return data
+    
+    @staticmethod
+    def _run_tesseract_list(paths, language, ocr_config):
+        """
+        Stream an image list through one Tesseract process and parse its TSV output
+        
+        The list is written to Tesseract's stdin and the TSV is read from
+        its stdout, so no list or output files are needed. communicate()
+        drains stdout and stderr together, which keeps a large batch from
+        blocking on a full pipe.
+        
+        Args:
+            paths: Image file paths, one page each
+            language: Language code for OCR
+            ocr_config: Tesseract command-line configuration string
+            
+        Returns:
+            Dictionary in pytesseract's DICT layout covering every page
+        """
+        command = [pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '-l', language]
+        command += shlex.split(ocr_config) + ['tsv']
+        try:
+            proc = subprocess.run(
+                command,
+                input='\n'.join(paths) + '\n',
+                capture_output=True,
+                encoding='utf-8'
             )
+        except FileNotFoundError:
+            raise pytesseract.TesseractNotFoundError()
+        
+        if proc.returncode:
+            raise pytesseract.TesseractError(proc.returncode, proc.stderr.strip())
+        
+        return pytesseract.pytesseract.file_to_dict(proc.stdout, '\t', -1)
+    
+    def _get_tess_api(self, language, oem, variables):
+        """
+        Get (or create) the tesserocr handle and its lock for a language, engine mode and variable set
+        
+        At most MAX_TESS_APIS handles are kept; an evicted handle is released
+        once the last call still using it finishes.
+        """
+        key = (language, oem, variables)
+        with self._tess_lock:
+            entry = self._tess_apis.get(key)
+            if entry is not None:
+                self._tess_apis.move_to_end(key)
+                return entry
+        
+        # Load the model outside the table lock so other languages aren't held up
+        api = tesserocr.PyTessBaseAPI(lang=language, oem=oem)
+        for name, value in variables:
+            api.SetVariable(name, value)
+        
+        with self._tess_lock:
+            # Another thread may have created the same handle meanwhile; keep the first
+            entry = self._tess_apis.setdefault(key, (api, threading.Lock()))
+            self._tess_apis.move_to_end(key)
+            while len(self._tess_apis) > MAX_TESS_APIS:
+                self._tess_apis.popitem(last=False)
+            return entry
+    
+    @staticmethod
+    def _parse_config(ocr_config):
+        """
+        Split a Tesseract configuration string into its parts
+        
+        Args:
+            ocr_config: String such as '--oem 3 --psm 6 -c name=value'
             
-            # Process results with improved paragraph handling
-            extracted_text = []
-            confidence_scores = []
-            bounding_boxes = []
-            current_line = []
-            current_line_y = -1
-            line_height = 0
-            
-            # Group text by lines and preserve paragraph structure
-            for i, conf in enumerate(data['conf']):
-                if conf > confidence_threshold:
-                    text = data['text'][i].strip()
-                    if text:
-                        y_pos = data['top'][i]
-                        height = data['height'][i]
-                        
-                        # Check if this is a new line
-                        if current_line_y == -1:
-                            current_line_y = y_pos
-                            line_height = height
-                        elif abs(y_pos - current_line_y) > line_height * 0.5:
-                            # New line detected
-                            if current_line:
-                                extracted_text.append(' '.join(current_line))
-                            current_line = [text]
-                            current_line_y = y_pos
-                            line_height = height
-                        else:
-                            # Same line
-                            current_line.append(text)
-                        
-                        confidence_scores.append(conf)
-                        bounding_boxes.append({
-                            'x': data['left'][i],
-                            'y': data['top'][i],
-                            'width': data['width'][i],
-                            'height': data['height'][i]
-                        })
-            
-            # Add the last line
-            if current_line:
-                extracted_text.append(' '.join(current_line))
-            
-            # Join lines with proper paragraph breaks
-            full_text = self._join_paragraphs(extracted_text)
-            
-            # Calculate overall confidence
-            avg_confidence = np.mean(confidence_scores) if confidence_scores else 0
+        Returns:
+            Tuple of (oem, psm, ((name, value), ...))
+        """
+        oem, psm, variables = 3, 6, []
+        tokens = shlex.split(ocr_config)
+        for i, token in enumerate(tokens[:-1]):
+            if token == '--oem':
+                oem = int(tokens[i + 1])
+            elif token == '--psm':
+                psm = int(tokens[i + 1])
+            elif token == '-c':
+                name, _, value = tokens[i + 1].partition('=')
+                variables.append((name, value))
+        return oem, psm, tuple(variables)
+    
+    def extract_text_configs(self, image, configs, language='eng', confidence_threshold=60):
+        """
+        Extract text from one image with several OCR configuration presets
+        
+        The image is encoded to a temporary PNG once and every preset reads
+        that file, instead of re-encoding the image for each Tesseract call.
+        Results go through the same cache as extract_text, so later
+        extract_text calls on the image with these presets are cache hits.
+        
+        Args:
+            image: Preprocessed image (numpy array or PIL Image)
+            configs: List of OCR configuration presets
+            language: Language code for OCR
+            confidence_threshold: Minimum confidence score for text
             
-            return {
-                'text': full_text,
-                'lines': extracted_text,
-                'confidence': avg_confidence,
-                'confidence_scores': confidence_scores,
-                'bounding_boxes': bounding_boxes,
-                'language': language,
-                'config': config,
-                'success': True
-            }
+        Returns:
+            Dictionary mapping each preset to its result dictionary
+        """
+        results = {}
+        try:
+            image = np.asarray(image)
+            image_key = utils.get_image_hash(image)
+            
+            with tempfile.TemporaryDirectory(prefix='ocr_configs_') as temp_dir:
+                path = os.path.join(temp_dir, 'image.png')
+                _save_png(image, path)
+                
+                for config in configs:
+                    try:
+                        results[config] = _extract_text_cached(
+                            image_key, language, config, confidence_threshold, self, path
+                        )
+                    except Exception as e:
+                        results[config] = _error_result(language, config, e)
             
         except Exception as e:
-            return {
-                'text': '',
-                'lines': [],
-                'confidence': 0,
-                'confidence_scores': [],
-                'bounding_boxes': [],
-                'language': language,
-                'config': config,
-                'success': False,
-                'error': str(e)
-            }
+            for config in configs:
+                results.setdefault(config, _error_result(language, config, e))
+        
+        return results
+    
+    def extract_text_batch(self, images, language='eng', config='default', confidence_threshold=60, max_workers=None):
+        """
+        Extract text from several images (e.g. the pages of a multi-page upload)
+        
+        With the pytesseract backend the images are written to temporary
+        files whose paths are piped to a single Tesseract process, so the
+        language model is loaded once per chunk instead of once per image.
+        Pages are split evenly into one chunk per worker (more when a chunk
+        would exceed BATCH_CHUNK_SIZE images), and up to max_workers chunks
+        run concurrently on a thread pool.
+        
+        Args:
+            images: List of preprocessed images (numpy arrays or PIL Images)
+            language: Language code for OCR
+            config: OCR configuration preset
+            confidence_threshold: Minimum confidence score for text
+            max_workers: Maximum number of concurrent Tesseract processes (defaults to CPU count)
+            
+        Returns:
+            List of result dictionaries in the same order as images
+        """
+        if not images:
+            return []
+        
+        if len(images) == 1 or TESSEROCR_AVAILABLE:
+            # The in-process handle already keeps the model loaded
+            return [self.extract_text(image, language, config, confidence_threshold) for image in images]
+        
+        try:
+            images = [np.asarray(image) for image in images]
+            image_keys = tuple(utils.get_image_hash(image) for image in images)
+            return _extract_text_batch_cached(
+                image_keys, language, config, confidence_threshold, max_workers, self, images
+            )
+            
+        except Exception:
+            # Fall back to one Tesseract call per image so a bad page only fails itself
+            return [self.extract_text(image, language, config, confidence_threshold) for image in images]
+    
+    def _extract_text_batch(self, images, language, config, confidence_threshold, max_workers):
+        """Run Tesseract over chunks of images with one process per chunk"""
+        ocr_config = self.ocr_configs.get(config, self.ocr_configs['default'])
+        
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        chunks = _split_batch(images, max(1, max_workers))
+        max_workers = max(1, min(max_workers, len(chunks)))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunk_pages = executor.map(
+                lambda chunk: self._image_list_to_data(chunk, language, ocr_config),
+                chunks
+            )
+            return [
+                self._build_result(data, language, config, confidence_threshold)
+                for pages in chunk_pages for data in pages
+            ]
+    
+    def _image_list_to_data(self, images, language, ocr_config):
+        """
+        Recognize several images with one Tesseract process via an image list
+        
+        Args:
+            images: List of numpy images
+            language: Language code for OCR
+            ocr_config: Tesseract command-line configuration string
+            
+        Returns:
+            List with one pytesseract DICT per image
+        """
+        with tempfile.TemporaryDirectory(prefix='ocr_batch_') as temp_dir:
+            paths = []
+            for index, image in enumerate(images):
+                path = os.path.join(temp_dir, f'page_{index:04d}.png')
+                _save_png(image, path)
+                paths.append(path)
+            
+            data = self._run_tesseract_list(paths, language, ocr_config)
+        
+        # Split the multi-page output on page_num (1-based, one page per listed image)
+        pages = [{key: [] for key in data} for _ in images]
+        for i, page_num in enumerate(data['page_num']):
+            page = pages[int(page_num) - 1]
+            for key, values in data.items():
+                page[key].append(values[i])
+        return pages
+    
+    def combine_results(self, results):
+        """
+        Combine per-page OCR results into a single result dictionary
+        
+        Args:
+            results: List of result dictionaries from extract_text
+            
+        Returns:
+            Dictionary with the pages' text joined by paragraph breaks
+        """
+        successful = [result for result in results if result['success']]
+        confidence_scores = np.concatenate(
+            [np.empty(0, np.uint8)] + [result['confidence_scores'] for result in successful]
+        )
+        word_confidences = np.concatenate(
+            [np.empty(0, np.float32)] + [result['box_conf'] for result in successful]
+        )
+        
+        combined = {
+            'text': '\n\n'.join(result['text'] for result in successful if result['text']),
+            'lines': [line for result in successful for line in result['lines']],
+            'confidence': float(word_confidences.mean()) if len(word_confidences) else 0,
+            'confidence_scores': confidence_scores,
+            **_empty_box_arrays(),
+            'language': results[0]['language'] if results else '',
+            'config': results[0]['config'] if results else '',
+            'success': bool(successful),
+            'pages': results
+        }
+        
+        if not successful and results:
+            combined['error'] = results[0].get('error', 'OCR processing failed')
+        
+        return combined
     
     def _join_paragraphs(self, lines):
         """
@@ -295,6 +800,59 @@ class OCREngine:
         # Join paragraphs with double line breaks
         return '\n\n'.join(paragraphs)
     
+    def _format_lines_to_text(self, lines):
+        """
+        Build paragraph-formatted text from OCR lines in a single pass
+        
+        Lines are grouped into blocks at blank lines; a block closes the
+        current paragraph when it is short, ends a sentence or is all caps.
+        
+        Args:
+            lines: List of text lines
+            
+        Returns:
+            Formatted text with improved paragraph structure
+        """
+        output = io.StringIO()
+        current_paragraph = []
+        pieces = []
+        
+        def flush_block():
+            # A block of consecutive non-empty lines is one line in the heuristic below
+            line = _WHITESPACE_RUN.sub(' ', ' '.join(pieces)).strip()
+            pieces.clear()
+            if not line:
+                return
+            
+            is_paragraph_break = (
+                len(line) < 50 or
+                _SENTENCE_END.search(line) is not None or
+                line.isupper()
+            )
+            current_paragraph.append(line)
+            if is_paragraph_break and len(current_paragraph) > 1:
+                write_paragraph()
+        
+        def write_paragraph():
+            if output.tell():
+                output.write('\n\n')
+            output.write(' '.join(current_paragraph))
+            current_paragraph.clear()
+        
+        for line in lines:
+            line = line.strip()
+            if line:
+                pieces.append(line)
+            elif pieces:
+                flush_block()
+        
+        if pieces:
+            flush_block()
+        if current_paragraph:
+            write_paragraph()
+        
+        return output.getvalue()
+    
     def extract_long_text(self, image, language='eng', confidence_threshold=60):
         """
         Extract text optimized for long paragraphs and documents
@@ -318,84 +876,12 @@ class OCREngine:
             
             if result['success']:
                 # Post-process for better paragraph detection
-                result['text'] = self._improve_paragraph_formatting(result['text'])
+                result['text'] = self._format_lines_to_text(result['lines'])
             
             return result
             
         except Exception as e:
-            return {
-                'text': '',
-                'lines': [],
-                'confidence': 0,
-                'confidence_scores': [],
-                'bounding_boxes': [],
-                'language': language,
-                'config': 'document',
-                'success': False,
-                'error': str(e)
-            }
-    
-    def _improve_paragraph_formatting(self, text):
-        """
-        Improve paragraph formatting for long text
-        
-        Args:
-            text: Raw extracted text
-            
-        Returns:
-            Formatted text with improved paragraph structure
-        """
-        if not text:
-            return text
-        
-        # Split into lines
-        lines = text.split('\n')
-        
-        # Clean and normalize lines
-        cleaned_lines = []
-        for line in lines:
-            line = line.strip()
-            if line:
-                # Remove excessive whitespace
-                line = ' '.join(line.split())
-                cleaned_lines.append(line)
-        
-        # Group lines into paragraphs
-        paragraphs = []
-        current_paragraph = []
-        
-        for line in cleaned_lines:
-            # Check if this line might be a paragraph break
-            # (short line, ends with period, or has different characteristics)
-            is_paragraph_break = (
-                len(line) < 50 or  # Short line
-                line.endswith('.') or  # Ends with period
-                line.endswith('!') or  # Ends with exclamation
-                line.endswith('?') or  # Ends with question mark
-                line.isupper() or  # All caps (might be heading)
-                (len(line.split()) <= 3 and line.endswith('.'))  # Very short sentence
-            )
-            
-            if is_paragraph_break and current_paragraph:
-                # End current paragraph
-                current_paragraph.append(line)
-                paragraphs.append(' '.join(current_paragraph))
-                current_paragraph = []
-            else:
-                current_paragraph.append(line)
-        
-        # Add remaining lines as last paragraph
-        if current_paragraph:
-            paragraphs.append(' '.join(current_paragraph))
-        
-        # Join paragraphs with proper spacing
-        result = '\n\n'.join(paragraphs)
-        
-        # Final cleanup
-        result = result.replace('\n\n\n', '\n\n')  # Remove excessive line breaks
-        result = result.strip()
-        
-        return result
+            return _error_result(language, 'document', e)
     
     def extract_text_optimized_for_paragraphs(self, image, language='eng', confidence_threshold=60):
         """
@@ -420,7 +906,7 @@ class OCREngine:
             
             if result['success']:
                 # Apply advanced paragraph formatting
-                result['text'] = self._improve_paragraph_formatting(result['text'])
+                result['text'] = self._format_lines_to_text(result['lines'])
                 
                 # Add paragraph count to metadata
                 paragraphs = [p for p in result['text'].split('\n\n') if p.strip()]
@@ -430,17 +916,7 @@ class OCREngine:
             return result
             
         except Exception as e:
-            return {
-                'text': '',
-                'lines': [],
-                'confidence': 0,
-                'confidence_scores': [],
-                'bounding_boxes': [],
-                'language': language,
-                'config': 'document',
-                'success': False,
-                'error': str(e)
-            }
+            return _error_result(language, 'document', e)
     
     def extract_text_with_boxes(self, image, language='eng', config='default'):
         """
@@ -455,36 +931,28 @@ class OCREngine:
             List of dictionaries with text and bounding box info
         """
         try:
-            if isinstance(image, Image.Image):
-                image = np.array(image)
-            
             ocr_config = self.ocr_configs.get(config, self.ocr_configs['default'])
             
             # Get detailed OCR data
-            data = pytesseract.image_to_data(
-                image, 
-                lang=language, 
-                config=ocr_config,
-                output_type=pytesseract.Output.DICT
-            )
+            data = self._image_to_data(image, language, ocr_config)
+            
+            # Include all detected text (one vectorized filter over the words)
+            words = self._words_array(data)
+            kept = np.flatnonzero((words['conf'] > 0) & (words['text'] != '')).tolist()
             
-            results = []
-            for i, conf in enumerate(data['conf']):
-                if conf > 0:  # Include all detected text
-                    text = data['text'][i].strip()
-                    if text:
-                        results.append({
-                            'text': text,
-                            'confidence': conf,
-                            'bbox': {
-                                'x': data['left'][i],
-                                'y': data['top'][i],
-                                'width': data['width'][i],
-                                'height': data['height'][i]
-                            }
-                        })
-            
-            return results
+            return [
+                {
+                    'text': words['text'][i],
+                    'confidence': data['conf'][i],
+                    'bbox': {
+                        'x': data['left'][i],
+                        'y': data['top'][i],
+                        'width': data['width'][i],
+                        'height': data['height'][i]
+                    }
+                }
+                for i in kept
+            ]
             
         except Exception as e:
             return []
@@ -492,7 +960,7 @@ class OCREngine:
     def get_available_languages(self):
         """Get list of available languages"""
         try:
-            return pytesseract.get_languages()
+            return list(_installed_languages())
         except:
             return ['eng']  # Default to English if Tesseract not available
     
@@ -507,29 +975,105 @@ class OCREngine:
             Detected language code or None
         """
         try:
-            if isinstance(image, Image.Image):
-                image = np.array(image)
+            # Convert once so each candidate pass hashes the same buffer without copying
+            image = np.asarray(image)
             
             # Try common languages
             test_languages = ['eng', 'fra', 'deu', 'spa', 'ita', 'por', 'rus', 'chi_sim', 'jpn', 'kor']
             
+            # A single OSD pass narrows the sweep to languages written in the detected script
+            detected = self.detect_script(image)
+            if detected is not None and detected['script_confidence'] >= MIN_SCRIPT_CONFIDENCE:
+                candidates = [lang for lang in test_languages if self.script_matches_language(detected['script'], lang)]
+                if not candidates:
+                    # None of the common languages use this script
+                    return detected['language']
+                if len(candidates) == 1:
+                    return candidates[0]
+                test_languages = candidates
+            
             best_language = None
             best_confidence = 0
             
+            # Tesseract runs outside the GIL, so candidate languages are tried concurrently
+            max_workers = min(len(test_languages), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self.extract_text, image, language=lang, confidence_threshold=0): lang
+                    for lang in test_languages
+                }
+                confidences = {}
+                for future in as_completed(futures):
+                    try:
+                        confidences[futures[future]] = future.result()['confidence']
+                    except:
+                        continue
+            
+            # Ties go to the earlier candidate, regardless of completion order
             for lang in test_languages:
-                try:
-                    result = self.extract_text(image, language=lang, confidence_threshold=0)
-                    if result['confidence'] > best_confidence:
-                        best_confidence = result['confidence']
-                        best_language = lang
-                except:
-                    continue
+                if confidences.get(lang, 0) > best_confidence:
+                    best_confidence = confidences[lang]
+                    best_language = lang
             
             return best_language if best_confidence > 30 else 'eng'
             
         except Exception as e:
             return 'eng'  # Default to English
     
+    def detect_script(self, image):
+        """
+        Detect the writing script of the image with Tesseract OSD (--psm 0)
+        
+        Args:
+            image: Input image
+            
+        Returns:
+            Dictionary with script, script_confidence and suggested language,
+            or None if detection is unavailable or fails
+        """
+        try:
+            osd = self._image_to_osd(image)
+            script = osd.get('script')
+            if not script:
+                return None
+            
+            languages = self.script_languages.get(script, ('eng',))
+            return {
+                'script': script,
+                'script_confidence': float(osd.get('script_conf', 0)),
+                'language': languages[0]
+            }
+            
+        except Exception:
+            return None
+    
+    def _image_to_osd(self, image):
+        """Run orientation and script detection, returning pytesseract's OSD DICT layout"""
+        if not TESSEROCR_AVAILABLE:
+            return pytesseract.image_to_osd(
+                image, config='--psm 0', output_type=pytesseract.Output.DICT
+            )
+        
+        api, api_lock = self._get_tess_api('osd', 3, ())
+        with api_lock:
+            api.SetPageSegMode(tesserocr.PSM.OSD_ONLY)
+            api.SetImage(image if isinstance(image, Image.Image) else Image.fromarray(image))
+            osd = api.DetectOrientationScript() or {}
+            api.Clear()
+        
+        return {'script': osd.get('script_name'), 'script_conf': osd.get('script_conf', 0)}
+    
+    def script_matches_language(self, script, language_code):
+        """Check whether an OSD script name fits the language code (or '+'-joined codes)"""
+        for code in language_code.split('+'):
+            scripts = [name for name, languages in self.script_languages.items() if code in languages]
+            if script in (scripts or ['Latin']):
+                return True
+            # Japanese pages are often reported as Han, and vice versa
+            if script in ('Han', 'Japanese') and set(scripts) & {'Han', 'Japanese'}:
+                return True
+        return False
+    
     def validate_language(self, language_code):
         """Check if a language code is supported"""
         return language_code in self.supported_languages
@@ -540,4 +1084,9 @@ class OCREngine:
     
     def get_ocr_configs(self):
         """Get available OCR configurations"""
-        return self.ocr_configs 
\ No newline at end of file
+        return self.ocr_configs 
+
+@st.cache_resource
+def get_ocr_engine():
+    """Shared OCREngine for the Streamlit server (keeps tesserocr handles warm across reruns and sessions)"""
+    return OCREngine(preload_languages=('eng',))
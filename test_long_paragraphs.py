@@ -4,18 +4,160 @@ Test script for long paragraph extraction
 This script creates sample images with long paragraphs to test OCR capabilities
 """
 
+import functools
+import hashlib
+import tempfile
+import cv2
 import numpy as np
+import PIL
 from PIL import Image, ImageDraw, ImageFont
 import os
+import re
 import sys
 
 # Import our modules
 from image_preprocessor import ImagePreprocessor
-from ocr_engine import OCREngine
+from ocr_engine import OCREngine, PNG_COMPRESS_LEVEL
 from text_processor import TextProcessor
 
-def create_long_paragraph_image():
-    """Create a sample image with long paragraphs for testing"""
+# One match per non-blank paragraph in '\n\n'-joined OCR output
+_PARA_RE = re.compile(r'\S(?:.*?\S)??(?=\n\n|\Z)', re.DOTALL)
+
+# Fonts tried in order before falling back to Pillow's built-in font
+FONT_PATHS = ("arial.ttf", "/System/Library/Fonts/Arial.ttf")
+
+@functools.lru_cache(maxsize=8)
+def load_font(size):
+    """Load the first available test font at the given size (parsed once per size)"""
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+def wrap_words(words, font, max_width, optimal=False):
+    """
+    Wrap words into lines no wider than max_width
+    
+    Each distinct word is measured once and line widths are summed from
+    those measurements, instead of re-measuring the whole line per word.
+    
+    Args:
+        words: List of words
+        font: PIL font used for drawing
+        max_width: Maximum line width in pixels
+        optimal: Use minimum-raggedness (optimal-fit) breaking instead of greedy
+        
+    Returns:
+        List of line strings
+    """
+    # getsize() is the measurement on Pillow versions without getlength()
+    measure = getattr(font, 'getlength', None) or (lambda text: font.getsize(text)[0])
+    space_width = measure(' ')
+    widths = {word: measure(word) for word in set(words)}
+    
+    if optimal:
+        return _wrap_words_optimal(words, widths, space_width, max_width)
+    
+    # Track only where the current line starts and its running width;
+    # a line's string is built once, when it is flushed
+    lines = []
+    start = 0
+    current_width = 0
+    
+    for index, word in enumerate(words):
+        word_width = widths[word]
+        if index == start:
+            current_width = word_width
+        elif current_width + space_width + word_width > max_width:
+            # Line is full, start a new one with this word
+            lines.append(' '.join(words[start:index]))
+            start = index
+            current_width = word_width
+        else:
+            current_width += space_width + word_width
+    
+    # Add the last line
+    if start < len(words):
+        lines.append(' '.join(words[start:]))
+    
+    return lines
+
+def _wrap_words_optimal(words, widths, space_width, max_width):
+    """
+    Break lines to minimize the sum of squared trailing space (last line is free)
+    
+    Args:
+        words: List of words
+        widths: Width of each distinct word
+        space_width: Width of a space
+        max_width: Maximum line width in pixels
+        
+    Returns:
+        List of line strings
+    """
+    count = len(words)
+    
+    # prefix[i] is the total width of the first i words, without spaces
+    prefix = [0.0]
+    for word in words:
+        prefix.append(prefix[-1] + widths[word])
+    
+    best = [0.0] + [float('inf')] * count
+    line_start = [0] * (count + 1)
+    
+    for end in range(1, count + 1):
+        # Walk the line start backwards; the line only gets wider, so stop at the first overflow
+        for start in range(end - 1, -1, -1):
+            line_width = prefix[end] - prefix[start] + (end - start - 1) * space_width
+            if line_width > max_width and start < end - 1:
+                break
+            cost = 0.0 if end == count else max(max_width - line_width, 0.0) ** 2
+            if best[start] + cost < best[end]:
+                best[end] = best[start] + cost
+                line_start[end] = start
+    
+    # Reconstruct the breakpoints from the end
+    lines = []
+    end = count
+    while end > 0:
+        start = line_start[end]
+        lines.append(' '.join(words[start:end]))
+        end = start
+    
+    return lines[::-1]
+
+# Glyph x-height Tesseract's LSTM is tuned for; larger text is downscaled to it
+TARGET_X_HEIGHT = 30
+
+# Rendered test image, written next to the script for inspection
+LONG_PARAGRAPH_IMAGE_PATH = "long_paragraphs_test.png"
+LONG_PARAGRAPH_FONT_SIZE = 18
+
+def _long_paragraph_cache_path():
+    """
+    Temp-dir cache file for the greedy-wrapped test image
+    
+    Named after a hash of everything the drawing depends on (this script,
+    the font file and the Pillow version), so a stale render is never reused.
+    """
+    hasher = hashlib.blake2b(digest_size=8)
+    with open(__file__, 'rb') as f:
+        hasher.update(f.read())
+    font_path = getattr(load_font(LONG_PARAGRAPH_FONT_SIZE), 'path', None)
+    hasher.update(f"{font_path}|{PIL.__version__}".encode())
+    return os.path.join(tempfile.gettempdir(), f"long_paragraphs_test_{hasher.hexdigest()}.png")
+
+@functools.lru_cache(maxsize=1)
+def create_long_paragraph_image(optimal=False):
+    """Create a sample image with long paragraphs for testing (optimal: optimal-fit line breaking)"""
+    # Skip rasterization when the greedy-wrapped image was already drawn from the same inputs
+    cache_path = None if optimal else _long_paragraph_cache_path()
+    if cache_path and os.path.exists(cache_path):
+        print(f"🎨 Reusing long paragraph test image: {cache_path}")
+        return np.asarray(Image.open(cache_path).convert('RGB'))
+    
     print("🎨 Creating long paragraph test image...")
     
     # Create a large image
@@ -24,13 +166,7 @@ def create_long_paragraph_image():
     draw = ImageDraw.Draw(image)
     
     # Try to use a default font, fallback to basic if not available
-    try:
-        font = ImageFont.truetype("arial.ttf", 18)
-    except:
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 18)
-        except:
-            font = ImageFont.load_default()
+    font = load_font(LONG_PARAGRAPH_FONT_SIZE)
     
     # Long paragraph text
     long_paragraphs = [
@@ -54,24 +190,7 @@ def create_long_paragraph_image():
         y_position += line_height + 10
         
         # Split paragraph into lines that fit the image width
-        words = paragraph.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            current_line.append(word)
-            test_line = ' '.join(current_line)
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            if bbox[2] > width - 2 * margin:
-                # Line is too long, remove last word and start new line
-                current_line.pop()
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        
-        # Add the last line
-        if current_line:
-            lines.append(' '.join(current_line))
+        lines = wrap_words(paragraph.split(), font, width - 2 * margin, optimal=optimal)
         
         # Draw the lines
         for line in lines:
@@ -80,11 +199,14 @@ def create_long_paragraph_image():
         
         y_position += 30  # Space between paragraphs
     
-    # Save the image
-    image.save("long_paragraphs_test.png")
-    print("✅ Long paragraph test image created: long_paragraphs_test.png")
+    # Save the image (only the greedy layout is reused on later runs)
+    if not optimal:
+        image.save(LONG_PARAGRAPH_IMAGE_PATH, compress_level=PNG_COMPRESS_LEVEL)
+        image.save(cache_path, compress_level=PNG_COMPRESS_LEVEL)
+    print(f"✅ Long paragraph test image created: {LONG_PARAGRAPH_IMAGE_PATH}")
     
-    return np.array(image)
+    # asarray wraps PIL's exported buffer instead of copying it a second time
+    return np.asarray(image)
 
 def test_long_paragraph_extraction():
     """Test OCR extraction on long paragraphs"""
@@ -112,11 +234,32 @@ def test_long_paragraph_extraction():
     }
     
     processed_image = preprocessor.preprocess_image(original_image, preprocessing_options)
+    
+    # Tesseract binarizes internally, so a single channel is all it needs
+    if processed_image.ndim == 3:
+        processed_image = cv2.cvtColor(processed_image, cv2.COLOR_RGB2GRAY)
+    
+    # Shrink oversized text so Tesseract doesn't rescale it internally on every pass
+    left, top, right, bottom = load_font(LONG_PARAGRAPH_FONT_SIZE).getbbox('x')
+    scale = TARGET_X_HEIGHT / max(bottom - top, 1)
+    if scale < 1:
+        processed_image = cv2.resize(processed_image, None, fx=scale, fy=scale,
+                                     interpolation=cv2.INTER_AREA)
+        print(f"   Downscaled to {processed_image.shape[1]}x{processed_image.shape[0]} for OCR")
     print("✅ Image preprocessing completed")
     
     # Test different OCR configurations
     test_configs = ['default', 'long_paragraphs', 'document', 'academic']
     
+    # Run the raw presets in one batch; the paragraph modes all use the 'document'
+    # preset, so they reuse its cached pass below
+    batch_results = ocr_engine.extract_text_configs(
+        processed_image,
+        configs=['default', 'document'],
+        language='eng',
+        confidence_threshold=60
+    )
+    
     for config in test_configs:
         print(f"\n🧪 Testing OCR config: {config}")
         
@@ -127,27 +270,24 @@ def test_long_paragraph_extraction():
                 confidence_threshold=60
             )
         else:
-            result = ocr_engine.extract_text(
-                processed_image,
-                language='eng',
-                config=config,
-                confidence_threshold=60
-            )
+            result = batch_results[config]
         
         if result['success']:
+            text = result['text']
+            text_length = len(text)
             print(f"   ✅ Success - Confidence: {result['confidence']:.1f}%")
-            print(f"   📝 Text length: {len(result['text'])} characters")
+            print(f"   📝 Text length: {text_length} characters")
             
             # Count paragraphs
-            paragraphs = [p for p in result['text'].split('\n\n') if p.strip()]
-            print(f"   📄 Paragraphs detected: {len(paragraphs)}")
+            paragraph_count = sum(1 for _ in _PARA_RE.finditer(text))
+            print(f"   📄 Paragraphs detected: {paragraph_count}")
             
             if 'paragraph_count' in result:
                 print(f"   📊 Paragraph count (metadata): {result['paragraph_count']}")
                 print(f"   📏 Avg paragraph length: {result['avg_paragraph_length']:.1f} words")
             
             # Show first 200 characters
-            preview = result['text'][:200] + "..." if len(result['text']) > 200 else result['text']
+            preview = text[:200] + ("..." if text_length > 200 else "")
             print(f"   📖 Preview: {preview}")
             
         else:
@@ -155,6 +295,15 @@ def test_long_paragraph_extraction():
     
     print(f"\n🎉 Long paragraph testing completed!")
 
+# Test paragraphs for the multilingual test, one per language
+MULTILINGUAL_TEXTS = {
+    'eng': "This is a test paragraph in English. It contains multiple sentences to test the OCR system's ability to handle long text and maintain proper paragraph formatting.",
+    'fra': "Ceci est un paragraphe de test en français. Il contient plusieurs phrases pour tester la capacité du système OCR à gérer du texte long et maintenir un formatage de paragraphe approprié.",
+    'deu': "Dies ist ein Testabsatz auf Deutsch. Er enthält mehrere Sätze, um die Fähigkeit des OCR-Systems zu testen, lange Texte zu verarbeiten und eine ordnungsgemäße Absatzformatierung beizubehalten.",
+    'spa': "Este es un párrafo de prueba en español. Contiene múltiples oraciones para probar la capacidad del sistema OCR para manejar texto largo y mantener el formato de párrafo apropiado.",
+    'ita': "Questo è un paragrafo di test in italiano. Contiene più frasi per testare la capacità del sistema OCR di gestire testi lunghi e mantenere la formattazione appropriata del paragrafo."
+}
+
 def test_multilingual_paragraphs():
     """Test paragraph extraction in different languages"""
     print("\n🌍 Testing multilingual paragraph extraction...")
@@ -166,70 +315,67 @@ def test_multilingual_paragraphs():
     # Test languages
     test_languages = ['eng', 'fra', 'deu', 'spa', 'ita']
     
+    # Render and preprocess one band per language (single channel, as above)
+    bands = []
     for lang in test_languages:
+        test_image = create_simple_test_image(MULTILINGUAL_TEXTS.get(lang, MULTILINGUAL_TEXTS['eng']))
+        processed = preprocessor.preprocess_image(test_image)
+        if processed.ndim == 3:
+            processed = cv2.cvtColor(processed, cv2.COLOR_RGB2GRAY)
+        bands.append(processed)
+    
+    # Stack the bands (padded to a common width) and OCR them in one
+    # multi-language Tesseract pass instead of one run per language
+    width = max(band.shape[1] for band in bands)
+    stitched = np.vstack([
+        cv2.copyMakeBorder(band, 0, 0, 0, width - band.shape[1], cv2.BORDER_CONSTANT, value=255)
+        for band in bands
+    ])
+    band_ends = np.cumsum([band.shape[0] for band in bands])
+    
+    result = ocr_engine.extract_text_optimized_for_paragraphs(
+        stitched,
+        language='+'.join(test_languages),
+        confidence_threshold=50
+    )
+    
+    # Attribute each word to the band its box starts in
+    word_band = np.searchsorted(band_ends, result.get('box_y', np.empty(0, np.int32)), side='right')
+    
+    for index, lang in enumerate(test_languages):
         print(f"\n🧪 Testing language: {lang} ({ocr_engine.get_language_name(lang)})")
         
-        # Create a simple test paragraph in the target language
-        test_texts = {
-            'eng': "This is a test paragraph in English. It contains multiple sentences to test the OCR system's ability to handle long text and maintain proper paragraph formatting.",
-            'fra': "Ceci est un paragraphe de test en français. Il contient plusieurs phrases pour tester la capacité du système OCR à gérer du texte long et maintenir un formatage de paragraphe approprié.",
-            'deu': "Dies ist ein Testabsatz auf Deutsch. Er enthält mehrere Sätze, um die Fähigkeit des OCR-Systems zu testen, lange Texte zu verarbeiten und eine ordnungsgemäße Absatzformatierung beizubehalten.",
-            'spa': "Este es un párrafo de prueba en español. Contiene múltiples oraciones para probar la capacidad del sistema OCR para manejar texto largo y mantener el formato de párrafo apropiado.",
-            'ita': "Questo è un paragrafo di test in italiano. Contiene più frasi per testare la capacità del sistema OCR di gestire testi lunghi e mantenere la formattazione appropriata del paragrafo."
-        }
-        
-        # Create test image with the text
-        test_image = create_simple_test_image(test_texts.get(lang, test_texts['eng']))
+        if not result['success']:
+            print(f"   ❌ Failed: {result.get('error', 'Unknown error')}")
+            continue
         
-        # Process and extract
-        processed = preprocessor.preprocess_image(test_image)
-        result = ocr_engine.extract_text_optimized_for_paragraphs(
-            processed,
-            language=lang,
-            confidence_threshold=50
-        )
+        in_band = word_band == index
+        if not in_band.any():
+            print("   ❌ Failed: No text detected")
+            continue
         
-        if result['success']:
-            print(f"   ✅ Success - Confidence: {result['confidence']:.1f}%")
-            print(f"   📝 Extracted: {result['text'][:100]}...")
-        else:
-            print(f"   ❌ Failed: {result.get('error', 'Unknown error')}")
+        band_text = ' '.join(word for word, keep in zip(result['box_text'], in_band) if keep)
+        print(f"   ✅ Success - Confidence: {result['box_conf'][in_band].mean():.1f}%")
+        print(f"   📝 Extracted: {band_text[:100]}...")
 
-def create_simple_test_image(text):
-    """Create a simple test image with given text"""
-    image = Image.new('RGB', (800, 200), color='white')
+def create_simple_test_image(text, optimal=False):
+    """Create a simple test image with given text (optimal: optimal-fit line breaking)"""
+    # Single channel canvas; preprocessing binarizes the text anyway
+    image = Image.new('L', (800, 200), color=255)
     draw = ImageDraw.Draw(image)
     
-    try:
-        font = ImageFont.truetype("arial.ttf", 20)
-    except:
-        font = ImageFont.load_default()
+    font = load_font(20)
     
     # Split text into lines
-    words = text.split()
-    lines = []
-    current_line = []
-    
-    for word in words:
-        current_line.append(word)
-        test_line = ' '.join(current_line)
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        if bbox[2] > 750:
-            current_line.pop()
-            if current_line:
-                lines.append(' '.join(current_line))
-            current_line = [word]
-    
-    if current_line:
-        lines.append(' '.join(current_line))
+    lines = wrap_words(text.split(), font, 750, optimal=optimal)
     
     # Draw lines
     y = 20
     for line in lines:
-        draw.text((20, y), line, fill='black', font=font)
+        draw.text((20, y), line, fill=0, font=font)
         y += 30
     
-    return np.array(image)
+    return np.asarray(image)
 
 if __name__ == "__main__":
     print("🧪 Long Paragraph OCR Testing")
@@ -4,92 +4,59 @@ System test script for Image-to-Text OCR System
 This script tests all components to ensure they're working correctly
 """
 
+import importlib
 import sys
 import os
+import time
 import traceback
 from datetime import datetime
 
+# (display name, module) pairs checked by test_imports and test_custom_modules
+REQUIRED_PACKAGES = (
+    ("OpenCV", "cv2"),
+    ("PyTesseract", "pytesseract"),
+    ("Streamlit", "streamlit"),
+    ("PIL/Pillow", "PIL.Image"),
+    ("NumPy", "numpy"),
+)
+CUSTOM_MODULES = (
+    ("ImagePreprocessor", "image_preprocessor"),
+    ("OCREngine", "ocr_engine"),
+    ("TextProcessor", "text_processor"),
+    ("Utils module", "utils"),
+)
+
+# Import everything once at module load; the tests only look the results up
+_IMPORTS = {}
+_IMPORT_ERRORS = {}
+for _, _module_name in REQUIRED_PACKAGES + CUSTOM_MODULES:
+    try:
+        _IMPORTS[_module_name] = importlib.import_module(_module_name)
+    except Exception as e:
+        # Any import-time failure (not just a missing package) fails only the test that needs it
+        _IMPORT_ERRORS[_module_name] = e
+
+def _check_imports(modules):
+    """Report the load-time import result for each (display name, module) pair"""
+    for display_name, module_name in modules:
+        if _IMPORTS.get(module_name) is None:
+            print(f"❌ {display_name} import failed: {_IMPORT_ERRORS.get(module_name)}")
+            return False
+        print(f"✅ {display_name} imported successfully")
+    
+    return True
+
 def test_imports():
     """Test if all required packages can be imported"""
     print("🔍 Testing package imports...")
     
-    try:
-        import cv2
-        print("✅ OpenCV imported successfully")
-    except ImportError as e:
-        print(f"❌ OpenCV import failed: {e}")
-        return False
-    
-    try:
-        import pytesseract
-        print("✅ PyTesseract imported successfully")
-    except ImportError as e:
-        print(f"❌ PyTesseract import failed: {e}")
-        return False
-    
-    try:
-        import streamlit
-        print("✅ Streamlit imported successfully")
-    except ImportError as e:
-        print(f"❌ Streamlit import failed: {e}")
-        return False
-    
-    try:
-        from PIL import Image
-        print("✅ PIL/Pillow imported successfully")
-    except ImportError as e:
-        print(f"❌ PIL/Pillow import failed: {e}")
-        return False
-    
-    try:
-        import numpy as np
-        print("✅ NumPy imported successfully")
-    except ImportError as e:
-        print(f"❌ NumPy import failed: {e}")
-        return False
-    
-    try:
-        import matplotlib.pyplot as plt
-        print("✅ Matplotlib imported successfully")
-    except ImportError as e:
-        print(f"❌ Matplotlib import failed: {e}")
-        return False
-    
-    return True
+    return _check_imports(REQUIRED_PACKAGES)
 
 def test_custom_modules():
     """Test if our custom modules can be imported"""
     print("\n🔍 Testing custom modules...")
     
-    try:
-        from image_preprocessor import ImagePreprocessor
-        print("✅ ImagePreprocessor imported successfully")
-    except ImportError as e:
-        print(f"❌ ImagePreprocessor import failed: {e}")
-        return False
-    
-    try:
-        from ocr_engine import OCREngine
-        print("✅ OCREngine imported successfully")
-    except ImportError as e:
-        print(f"❌ OCREngine import failed: {e}")
-        return False
-    
-    try:
-        from text_processor import TextProcessor
-        print("✅ TextProcessor imported successfully")
-    except ImportError as e:
-        print(f"❌ TextProcessor import failed: {e}")
-        return False
-    
-    try:
-        import utils
-        print("✅ Utils module imported successfully")
-    except ImportError as e:
-        print(f"❌ Utils module import failed: {e}")
-        return False
-    
-    return True
+    return _check_imports(CUSTOM_MODULES)
 
 def test_tesseract():
     """Test if Tesseract is working"""
@@ -179,6 +146,42 @@ def test_ocr_functionality():
         traceback.print_exc()
         return False
 
+def test_batch_chunking():
+    """Test that small multi-page batches are spread over all workers"""
+    print("\n🔍 Testing batch chunking...")
+    
+    from ocr_engine import BATCH_CHUNK_SIZE, _split_batch
+    
+    pages = list(range(10))
+    chunks = _split_batch(pages, 4)
+    assert len(chunks) == 4, f"expected 4 chunks for 10 pages, got {len(chunks)}"
+    assert [page for chunk in chunks for page in chunk] == pages
+    
+    # Large batches still respect the per-process chunk limit
+    chunks = _split_batch(list(range(4 * BATCH_CHUNK_SIZE + 1)), 4)
+    assert all(len(chunk) <= BATCH_CHUNK_SIZE for chunk in chunks)
+    print("✅ Batch chunking test passed")
+
+def test_line_grouping():
+    """Test that words are grouped into lines against the line's first word"""
+    print("\n🔍 Testing line grouping...")
+    
+    from ocr_engine import OCREngine
+    
+    # Each word is 4 px below the previous one: never more than half a 10 px
+    # word height from its neighbour, but the third word is 8 px from the first
+    data = {
+        'text': ['one', 'two', 'three', 'four'],
+        'conf': [90, 90, 90, 90],
+        'left': [0, 40, 80, 120],
+        'top': [0, 4, 8, 12],
+        'width': [30, 30, 30, 30],
+        'height': [10, 10, 10, 10],
+    }
+    result = OCREngine()._build_result(data, 'eng', 'default', 60)
+    assert result['lines'] == ['one two', 'three four'], result['lines']
+    print("✅ Line grouping test passed")
+
 def test_text_processing():
     """Test text processing functionality"""
     print("\n🔍 Testing text processing...")
@@ -250,17 +253,22 @@ def run_comprehensive_test():
         ("Tesseract OCR", test_tesseract),
         ("Image Processing", test_image_processing),
         ("OCR Functionality", test_ocr_functionality),
+        ("Batch Chunking", test_batch_chunking),
+        ("Line Grouping", test_line_grouping),
         ("Text Processing", test_text_processing),
         ("Export Functionality", test_export_functionality)
     ]
     
     passed = 0
     total = len(tests)
+    durations = {}
     
     for test_name, test_func in tests:
         print(f"\n{'='*20} {test_name} {'='*20}")
+        start = time.perf_counter_ns()
         try:
-            if test_func():
+            # Tests either report False or raise on failure; assert-style tests return None
+            if test_func() is not False:
                 passed += 1
                 print(f"✅ {test_name} PASSED")
             else:
@@ -268,11 +276,18 @@ def run_comprehensive_test():
         except Exception as e:
             print(f"❌ {test_name} FAILED with exception: {e}")
             traceback.print_exc()
+        durations[test_name] = (time.perf_counter_ns() - start) / 1e6
+        print(f"⏱️ {durations[test_name]:.1f} ms")
     
     print(f"\n{'='*60}")
     print(f"Test completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Results: {passed}/{total} tests passed")
     
+    # Slowest tests first
+    print("\n⏱️ Timings:")
+    for test_name, elapsed in sorted(durations.items(), key=lambda item: item[1], reverse=True):
+        print(f"   {test_name}: {elapsed:.1f} ms")
+    
     if passed == total:
         print("🎉 All tests passed! Your system is ready to use.")
         print("\n🚀 You can now run:")
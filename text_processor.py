@@ -1,7 +1,17 @@
 import os
 import io
+import copy
+import functools
+import hashlib
+import re
+import tempfile
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional
+import numpy as np
 import streamlit as st
 
 try:
@@ -25,6 +35,279 @@ try:
 except ImportError:
     TTS_AVAILABLE = False
 
+try:
+    import numba as nb
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # str.isspace() by code point; no code point above U+3000 is whitespace
+    _SPACE_LUT = np.array([chr(code).isspace() for code in range(0x3001)], dtype=np.bool_)
+    
+    @nb.njit(cache=True)
+    def _text_counts(codes, is_space):
+        """
+        Count non-space characters, words, sentences and non-blank lines in one pass
+        
+        Matches len(text.replace(' ', '')), len(text.split()) and the non-blank
+        pieces of text.split('.') and text.split('\\n') for UTF-32 code points.
+        """
+        characters = words = sentences = paragraphs = 0
+        in_word = sentence_open = line_open = False
+        lut_size = is_space.shape[0]
+        for code in codes:
+            space = code < lut_size and is_space[code]
+            if code != 32:
+                characters += 1
+            if space:
+                in_word = False
+            else:
+                if not in_word:
+                    words += 1
+                    in_word = True
+                # '.' ends a sentence; anything else visible opens one
+                if code == 46:
+                    if sentence_open:
+                        sentences += 1
+                    sentence_open = False
+                else:
+                    sentence_open = True
+                line_open = True
+            if code == 10:
+                if line_open:
+                    paragraphs += 1
+                line_open = False
+        return characters, words, sentences + sentence_open, paragraphs + line_open
+    
+    def _code_points(text):
+        """Text as a UTF-32 code point array (surrogatepass keeps lone surrogates countable)"""
+        return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    
+    # Compile, or load the cached build, at import instead of on the first request
+    try:
+        _text_counts(_code_points(' '), _SPACE_LUT)
+    except Exception:
+        NUMBA_AVAILABLE = False
+
+# Structured data patterns, compiled once
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+_PHONE_RE = re.compile(r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_DATE_RE = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
+_DIGIT_RE = re.compile(r'\d')
+
+# Common OCR misreads fixed by clean_text: '|' for 'I', and '0'/'1' for 'O'/'l' in some fonts
+_OCR_FIX_TABLE = str.maketrans({'|': 'I', '0': 'O', '1': 'l'})
+
+# Per-request timeout for the translation service, so a stalled connection can't hang a rerun
+TRANSLATION_TIMEOUT_SECONDS = 15.0
+
+# Seconds a failed translation is answered from memory before the service is tried again
+TRANSLATION_RETRY_SECONDS = 30
+
+# Marker placed between texts translated together in one request
+TRANSLATION_BATCH_SEPARATOR = '<<<SEP>>>'
+
+# Texts longer than this are checked for repeated segments before translating
+TRANSLATION_DEDUP_MIN_LENGTH = 500
+
+# Share of a text's characters that repeats must save before it is sent as separate segments
+TRANSLATION_DEDUP_MIN_SAVING = 0.2
+
+# Sentence and line boundaries, captured so the text can be rebuilt around translated segments
+_SEGMENT_BOUNDARY_RE = re.compile(r'((?<=[.!?])\s+|\n+)')
+
+# (text key, target, source) -> (time.monotonic() of the failure, error message)
+_translation_failures = {}
+# Sessions translate on their own script threads, so every access goes through this lock
+_translation_failures_lock = threading.Lock()
+
+def _text_key(text):
+    """Fixed-size cache key for a text (16-byte blake2b digest), hashed once per call"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _translate_cached(text_key, target_language, source_language, _translator, _text):
+    """Translate text, memoized on the text key and language pair (failures are not cached)"""
+    translation = _translator.translate(_text, dest=target_language, src=source_language)
+    return {
+        'translated_text': translation.text,
+        'source_language': translation.src,
+        'confidence': getattr(translation, 'confidence', None)
+    }
+
+# Synthesized speech is kept here across sessions, one MP3 per (text, language)
+TTS_CACHE_DIR = Path.home() / '.cache' / 'img2text' / 'tts'
+
+# Total size of the speech cache; least recently used files are removed beyond this
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+def _tts_cache_path(text_key, language):
+    """Disk cache location for the speech of one text (by text key) in one language"""
+    return TTS_CACHE_DIR / f'{text_key}_{language}.mp3'
+
+def _load_tts_audio(path):
+    """Read cached speech, marking it as recently used; None if it is not cached"""
+    try:
+        audio = path.read_bytes()
+        os.utime(path)
+        return audio
+    except OSError:
+        return None
+
+def _store_tts_audio(path, audio):
+    """Write synthesized speech to the disk cache; the cache is best effort"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a uniquely named file then rename, so concurrent writers
+        # don't share a partial file and readers never see one
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix='.', suffix='.part', delete=False) as partial:
+            partial.write(audio)
+        os.replace(partial.name, path)
+        _prune_tts_cache(path.parent)
+    except OSError:
+        pass
+
+def _prune_tts_cache(cache_dir):
+    """Remove least recently used files until the cache fits in TTS_CACHE_MAX_BYTES"""
+    entries = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.mp3'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    
+    entries.sort()
+    for _, size, entry_path in entries:
+        if total <= TTS_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(entry_path)
+            total -= size
+        except OSError:
+            continue
+
+@st.cache_data(max_entries=64, ttl=3600, show_spinner=False)
+def _synthesize_cached(text_key, language, _text):
+    """Synthesize speech to MP3 bytes, memoized on the text key and language (failures are not cached)"""
+    return b''.join(gTTS(text=_text, lang=language, slow=False).stream())
+
+@functools.lru_cache(maxsize=1)
+def _docx_template_package():
+    """Parsed default DOCX package with the fixed title heading, built once per process"""
+    doc = Document()
+    title = doc.add_heading('Extracted Text from Image', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return doc.part.package
+
+# Supported languages for translation
+TRANSLATION_LANGUAGES = MappingProxyType({
+    'en': 'English',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ru': 'Russian',
+    'ja': 'Japanese',
+    'ko': 'Korean',
+    'zh-cn': 'Chinese (Simplified)',
+    'zh-tw': 'Chinese (Traditional)',
+    'ar': 'Arabic',
+    'hi': 'Hindi',
+    'bn': 'Bengali',
+    'te': 'Telugu',
+    'ta': 'Tamil',
+    'mr': 'Marathi',
+    'gu': 'Gujarati',
+    'kn': 'Kannada',
+    'ml': 'Malayalam',
+    'or': 'Oriya',
+    'pa': 'Punjabi',
+    'ur': 'Urdu',
+    'ne': 'Nepali',
+    'si': 'Sinhala',
+    'th': 'Thai',
+    'vi': 'Vietnamese',
+    'id': 'Indonesian',
+    'ms': 'Malay',
+    'tl': 'Filipino',
+    'sw': 'Swahili',
+    'zu': 'Zulu',
+    'af': 'Afrikaans',
+    'nl': 'Dutch',
+    'sv': 'Swedish',
+    'no': 'Norwegian',
+    'da': 'Danish',
+    'fi': 'Finnish',
+    'pl': 'Polish',
+    'cs': 'Czech',
+    'sk': 'Slovak',
+    'hu': 'Hungarian',
+    'ro': 'Romanian',
+    'bg': 'Bulgarian',
+    'hr': 'Croatian',
+    'sr': 'Serbian',
+    'sl': 'Slovenian',
+    'et': 'Estonian',
+    'lv': 'Latvian',
+    'lt': 'Lithuanian',
+    'tr': 'Turkish',
+    'el': 'Greek',
+    'he': 'Hebrew',
+    'fa': 'Persian',
+    'ps': 'Pashto',
+    'ku': 'Kurdish',
+    'sd': 'Sindhi',
+    'bal': 'Balochi',
+    'ceb': 'Cebuano',
+    'ilo': 'Ilocano',
+    'war': 'Waray',
+    'hil': 'Hiligaynon',
+    'bik': 'Bikol',
+    'pam': 'Kapampangan',
+    'pag': 'Pangasinan',
+    'km': 'Khmer',
+    'lo': 'Lao',
+    'my': 'Burmese',
+    'dv': 'Dhivehi',
+    'as': 'Assamese',
+    'bho': 'Bhojpuri',
+    'awa': 'Awadhi',
+    'mai': 'Maithili',
+    'mag': 'Magahi',
+    'raj': 'Rajasthani',
+    'kon': 'Konkani',
+    'tcy': 'Tulu',
+    'bo': 'Tibetan',
+    'dz': 'Dzongkha',
+    'new': 'Newari',
+    'syl': 'Sylheti',
+    'kha': 'Khasi',
+    'gar': 'Garo',
+    'mni': 'Manipuri',
+    'brx': 'Bodo',
+    'sat': 'Santali',
+    'kui': 'Kui',
+    'gon': 'Gondi',
+    'kru': 'Kurukh',
+    'sad': 'Sadan',
+    'ho': 'Ho',
+    'mwr': 'Marwari',
+    'wbr': 'Wagdi',
+    'bgc': 'Haryanvi',
+    'hne': 'Chhattisgarhi',
+    'kfy': 'Kumaoni',
+    'bfy': 'Bagheli'
+})
+
 class TextProcessor:
     """
     Handles text processing operations including translation, export, and text-to-speech
@@ -34,115 +317,23 @@ class TextProcessor:
         self.translator = None
         if TRANSLATOR_AVAILABLE:
             try:
-                self.translator = Translator()
+                # googletrans keeps one HTTP/2 httpx client per Translator, so its
+                # connections stay alive for the life of this (shared) instance
+                self.translator = Translator(timeout=TRANSLATION_TIMEOUT_SECONDS)
             except:
                 pass
         
-        # Supported languages for translation
-        self.translation_languages = {
-            'en': 'English',
-            'es': 'Spanish',
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ru': 'Russian',
-            'ja': 'Japanese',
-            'ko': 'Korean',
-            'zh-cn': 'Chinese (Simplified)',
-            'zh-tw': 'Chinese (Traditional)',
-            'ar': 'Arabic',
-            'hi': 'Hindi',
-            'bn': 'Bengali',
-            'te': 'Telugu',
-            'ta': 'Tamil',
-            'mr': 'Marathi',
-            'gu': 'Gujarati',
-            'kn': 'Kannada',
-            'ml': 'Malayalam',
-            'or': 'Oriya',
-            'pa': 'Punjabi',
-            'ur': 'Urdu',
-            'ne': 'Nepali',
-            'si': 'Sinhala',
-            'th': 'Thai',
-            'vi': 'Vietnamese',
-            'id': 'Indonesian',
-            'ms': 'Malay',
-            'tl': 'Filipino',
-            'sw': 'Swahili',
-            'zu': 'Zulu',
-            'af': 'Afrikaans',
-            'nl': 'Dutch',
-            'sv': 'Swedish',
-            'no': 'Norwegian',
-            'da': 'Danish',
-            'fi': 'Finnish',
-            'pl': 'Polish',
-            'cs': 'Czech',
-            'sk': 'Slovak',
-            'hu': 'Hungarian',
-            'ro': 'Romanian',
-            'bg': 'Bulgarian',
-            'hr': 'Croatian',
-            'sr': 'Serbian',
-            'sl': 'Slovenian',
-            'et': 'Estonian',
-            'lv': 'Latvian',
-            'lt': 'Lithuanian',
-            'tr': 'Turkish',
-            'el': 'Greek',
-            'he': 'Hebrew',
-            'fa': 'Persian',
-            'ps': 'Pashto',
-            'ku': 'Kurdish',
-            'sd': 'Sindhi',
-            'bal': 'Balochi',
-            'ceb': 'Cebuano',
-            'ilo': 'Ilocano',
-            'war': 'Waray',
-            'hil': 'Hiligaynon',
-            'bik': 'Bikol',
-            'pam': 'Kapampangan',
-            'pag': 'Pangasinan',
-            'km': 'Khmer',
-            'lo': 'Lao',
-            'my': 'Burmese',
-            'dv': 'Dhivehi',
-            'as': 'Assamese',
-            'bho': 'Bhojpuri',
-            'awa': 'Awadhi',
-            'mai': 'Maithili',
-            'mag': 'Magahi',
-            'raj': 'Rajasthani',
-            'kon': 'Konkani',
-            'tcy': 'Tulu',
-            'bo': 'Tibetan',
-            'dz': 'Dzongkha',
-            'new': 'Newari',
-            'syl': 'Sylheti',
-            'kha': 'Khasi',
-            'gar': 'Garo',
-            'mni': 'Manipuri',
-            'brx': 'Bodo',
-            'sat': 'Santali',
-            'kui': 'Kui',
-            'gon': 'Gondi',
-            'kru': 'Kurukh',
-            'sad': 'Sadan',
-            'ho': 'Ho',
-            'mwr': 'Marwari',
-            'wbr': 'Wagdi',
-            'bgc': 'Haryanvi',
-            'hne': 'Chhattisgarhi',
-            'kfy': 'Kumaoni',
-            'bfy': 'Bagheli'
-        }
+        # Supported languages for translation (shared, read-only)
+        self.translation_languages = TRANSLATION_LANGUAGES
     
     def translate_text(self, text: str, target_language: str, source_language: str = 'auto') -> Dict:
         """
         Translate text to target language
         
+        Long texts where repeated sentences or lines (form labels, page
+        headers) make up a large share of the text send each distinct
+        segment only once and are reassembled afterwards.
+        
         Args:
             text: Text to translate
             target_language: Target language code
@@ -151,6 +342,40 @@ class TextProcessor:
         Returns:
             Dictionary with translation results
         """
+        unavailable = self._translation_unavailable(text)
+        if unavailable:
+            return unavailable
+        
+        if len(text) > TRANSLATION_DEDUP_MIN_LENGTH:
+            # Even entries are segments, odd entries the whitespace between them
+            parts = _SEGMENT_BOUNDARY_RE.split(text)
+            segments = [part for part in parts[0::2] if part.strip()]
+            unique = list(dict.fromkeys(segments))
+            saved = sum(map(len, segments)) - sum(map(len, unique))
+            
+            if saved >= TRANSLATION_DEDUP_MIN_SAVING * len(text):
+                batch = self._translate_joined(unique, target_language, source_language)
+                if not batch['success']:
+                    return batch
+                
+                # A lost marker falls through to translating the whole text at once
+                if batch['translated_texts'] is not None:
+                    # Put each translated segment back in place, keeping the original separators
+                    translated = dict(zip(unique, batch['translated_texts']))
+                    parts[0::2] = [translated.get(part, part) for part in parts[0::2]]
+                    return {
+                        'success': True,
+                        'original_text': text,
+                        'translated_text': ''.join(parts),
+                        'source_language': batch['source_language'],
+                        'target_language': target_language,
+                        'confidence': None
+                    }
+        
+        return self._translate_request(text, target_language, source_language)
+    
+    def _translation_unavailable(self, text):
+        """Error result when the service is missing or there is nothing to translate, else None"""
         if not TRANSLATOR_AVAILABLE or not self.translator:
             return {
                 'success': False,
@@ -163,29 +388,106 @@ class TextProcessor:
                 'error': 'No text to translate'
             }
         
+        return None
+    
+    def _translate_request(self, text, target_language, source_language):
+        """Send one translation request, answering repeats and recent failures from memory"""
+        # Don't retry a request that just failed (e.g. during a service outage)
+        text_key = _text_key(text)
+        key = (text_key, target_language, source_language)
+        now = time.monotonic()
+        with _translation_failures_lock:
+            failure = _translation_failures.get(key)
+        if failure and now - failure[0] < TRANSLATION_RETRY_SECONDS:
+            return {
+                'success': False,
+                'error': failure[1]
+            }
+        
         try:
-            # Translate the text
-            translation = self.translator.translate(
-                text, 
-                dest=target_language, 
-                src=source_language
-            )
+            # Translate the text (repeat requests are served from the cache)
+            translation = _translate_cached(text_key, target_language, source_language, self.translator, text)
             
             return {
                 'success': True,
                 'original_text': text,
-                'translated_text': translation.text,
-                'source_language': translation.src,
                 'target_language': target_language,
-                'confidence': getattr(translation, 'confidence', None)
+                **translation
             }
             
         except Exception as e:
+            error = f'Translation failed: {str(e)}'
+            
+            # Remember the failure, dropping entries that have expired
+            with _translation_failures_lock:
+                for stale in [k for k, (failed_at, _) in _translation_failures.items()
+                              if now - failed_at >= TRANSLATION_RETRY_SECONDS]:
+                    del _translation_failures[stale]
+                _translation_failures[key] = (now, error)
+            
             return {
                 'success': False,
-                'error': f'Translation failed: {str(e)}'
+                'error': error
             }
     
+    def translate_batch(self, texts: List[str], target_language: str, source_language: str = 'auto') -> Dict:
+        """
+        Translate several texts with a single translation request
+        
+        Repeated texts are sent once. The distinct texts are joined around a
+        marker, translated as one string and split again; if the marker does
+        not survive translation, each text is translated on its own instead.
+        
+        Args:
+            texts: Texts to translate
+            target_language: Target language code
+            source_language: Source language code (auto-detect if 'auto')
+            
+        Returns:
+            Dictionary with translation results ('translated_texts' in input order)
+        """
+        unavailable = self._translation_unavailable(''.join(texts))
+        if unavailable:
+            return unavailable
+        
+        unique = list(dict.fromkeys(texts))
+        result = self._translate_joined(unique, target_language, source_language)
+        if not result['success']:
+            return result
+        
+        translated_texts = result['translated_texts']
+        
+        # The provider dropped or merged a marker; fall back to one (cached) request per text
+        if translated_texts is None:
+            translated_texts = []
+            for text in unique:
+                if not text.strip():
+                    translated_texts.append(text)
+                    continue
+                
+                single = self._translate_request(text, target_language, source_language)
+                if not single['success']:
+                    return single
+                translated_texts.append(single['translated_text'])
+        
+        translated = dict(zip(unique, translated_texts))
+        return {
+            'success': True,
+            'original_texts': list(texts),
+            'translated_texts': [translated[text] for text in texts],
+            'source_language': result['source_language'],
+            'target_language': target_language
+        }
+    
+    def _translate_joined(self, texts, target_language, source_language):
+        """Translate distinct texts in one marker-joined request ('translated_texts' is None if a marker was lost)"""
+        separator = f'\n\n{TRANSLATION_BATCH_SEPARATOR}\n\n'
+        result = self._translate_request(separator.join(texts), target_language, source_language)
+        if result['success']:
+            pieces = [piece.strip() for piece in result['translated_text'].split(TRANSLATION_BATCH_SEPARATOR)]
+            result['translated_texts'] = pieces if len(pieces) == len(texts) else None
+        return result
+    
     def export_to_txt(self, text: str, filename: str = None) -> bytes:
         """
         Export text to TXT format
@@ -208,8 +510,9 @@ class TextProcessor:
 
 """
         
-        content = header + text
-        return content.encode('utf-8')
+        # Encode the parts separately; joining bytes sizes the result once, with no
+        # intermediate str copy of the whole document
+        return b''.join((header.encode('utf-8'), text.encode('utf-8')))
     
     def export_to_docx(self, text: str, filename: str = None, metadata: Dict = None) -> bytes:
         """
@@ -230,12 +533,9 @@ class TextProcessor:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"extracted_text_{timestamp}.docx"
         
-        # Create document
-        doc = Document()
-        
-        # Add title
-        title = doc.add_heading('Extracted Text from Image', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # Create document with its title from a copy of the parsed template (copying the
+        # whole package keeps every proxy attached to the copied XML trees)
+        doc = copy.deepcopy(_docx_template_package()).main_document_part.document
         
         # Add metadata
         if metadata:
@@ -282,26 +582,59 @@ class TextProcessor:
             return None
         
         try:
-            # Create TTS object
-            tts = gTTS(text=text, lang=language, slow=False)
+            # Reuse speech synthesized in an earlier session
+            text_key = _text_key(text)
+            path = _tts_cache_path(text_key, language)
+            audio = _load_tts_audio(path)
+            if audio is not None:
+                return audio
             
-            # Save to bytes
-            audio_bytes = io.BytesIO()
-            tts.write_to_fp(audio_bytes)
-            audio_bytes.seek(0)
-            
-            return audio_bytes.getvalue()
+            audio = _synthesize_cached(text_key, language, text)
+            _store_tts_audio(path, audio)
+            return audio
             
         except Exception as e:
             st.error(f"Text-to-speech failed: {str(e)}")
             return None
     
-    def clean_text(self, text: str) -> str:
+    def text_to_speech_stream(self, text: str, language: str = 'en') -> Iterator[bytes]:
+        """
+        Convert text to speech, yielding MP3 data as each chunk is synthesized
+        
+        gTTS splits the text into short segments and synthesizes them one
+        request at a time, so the first chunk arrives long before the last.
+        Errors are raised to the caller.
+        
+        Args:
+            text: Text to convert
+            language: Language code for TTS
+            
+        Yields:
+            MP3 byte chunks, playable when concatenated in order
+        """
+        if not TTS_AVAILABLE or not text.strip():
+            return
+        
+        # Cached speech is available in full straight away
+        path = _tts_cache_path(_text_key(text), language)
+        audio = _load_tts_audio(path)
+        if audio is not None:
+            yield audio
+            return
+        
+        chunks = []
+        for chunk in gTTS(text=text, lang=language, slow=False).stream():
+            chunks.append(chunk)
+            yield chunk
+        _store_tts_audio(path, b''.join(chunks))
+    
+    def clean_text(self, text: str, fix_digits: bool = True) -> str:
         """
         Clean and format extracted text
         
         Args:
             text: Raw extracted text
+            fix_digits: Also read '0' as 'O' and '1' as 'l' (pass False to keep real numbers)
             
         Returns:
             Cleaned text
@@ -309,13 +642,14 @@ class TextProcessor:
         if not text:
             return ""
         
-        # Remove extra whitespace
+        # Remove extra whitespace (split/join beats a regex sub here)
         text = ' '.join(text.split())
         
-        # Fix common OCR errors
-        text = text.replace('|', 'I')  # Common OCR error
-        text = text.replace('0', 'O')  # Common OCR error in some fonts
-        text = text.replace('1', 'l')  # Common OCR error
+        # Fix common OCR errors in one pass over the text
+        if fix_digits:
+            text = text.translate(_OCR_FIX_TABLE)
+        else:
+            text = text.replace('|', 'I')  # Common OCR error
         
         # Capitalize first letter of sentences
         sentences = text.split('. ')
@@ -334,8 +668,6 @@ class TextProcessor:
         Returns:
             Dictionary with extracted structured data
         """
-        import re
-        
         structured_data = {
             'emails': [],
             'phone_numbers': [],
@@ -344,39 +676,42 @@ class TextProcessor:
             'numbers': []
         }
         
+        # Each pattern needs a literal the text may lack; checking for it (stopping at the
+        # first hit) is far cheaper than a findall that tries every position
+        has_digits = _DIGIT_RE.search(text) is not None
+        
         # Extract emails
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        structured_data['emails'] = re.findall(email_pattern, text)
+        if '@' in text:
+            structured_data['emails'] = _EMAIL_RE.findall(text)
         
         # Extract phone numbers
-        phone_pattern = r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-        structured_data['phone_numbers'] = re.findall(phone_pattern, text)
+        if has_digits:
+            structured_data['phone_numbers'] = _PHONE_RE.findall(text)
         
         # Extract URLs
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        structured_data['urls'] = re.findall(url_pattern, text)
+        structured_data['urls'] = _URL_RE.findall(text)
         
         # Extract numbers
-        number_pattern = r'\b\d+(?:\.\d+)?\b'
-        structured_data['numbers'] = re.findall(number_pattern, text)
+        if has_digits:
+            structured_data['numbers'] = _NUMBER_RE.findall(text)
         
         # Extract dates (basic pattern)
-        date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
-        structured_data['dates'] = re.findall(date_pattern, text)
+        if has_digits:
+            structured_data['dates'] = _DATE_RE.findall(text)
         
         return structured_data
     
     def get_translation_languages(self) -> Dict[str, str]:
         """Get available translation languages"""
-        return self.translation_languages
+        return TRANSLATION_LANGUAGES
     
     def get_language_name(self, language_code: str) -> str:
         """Get human-readable language name"""
-        return self.translation_languages.get(language_code, language_code)
+        return TRANSLATION_LANGUAGES.get(language_code, language_code)
     
     def validate_language(self, language_code: str) -> bool:
         """Check if language code is supported"""
-        return language_code in self.translation_languages
+        return language_code in TRANSLATION_LANGUAGES
     
     def get_word_count(self, text: str) -> Dict:
         """
@@ -396,21 +731,32 @@ class TextProcessor:
                 'paragraphs': 0
             }
         
-        # Count characters (excluding spaces)
-        characters = len(text.replace(' ', ''))
-        
-        # Count words
-        words = len(text.split())
-        
-        # Count sentences (basic)
-        sentences = len([s for s in text.split('.') if s.strip()])
-        
-        # Count paragraphs
-        paragraphs = len([p for p in text.split('\n') if p.strip()])
+        if NUMBA_AVAILABLE:
+            # One compiled sweep over the code points instead of four scans and three lists
+            characters, words, sentences, paragraphs = (
+                int(count) for count in _text_counts(_code_points(text), _SPACE_LUT)
+            )
+        else:
+            # Count characters (excluding spaces)
+            characters = len(text) - text.count(' ')
+            
+            # Count words
+            words = len(text.split())
+            
+            # Count sentences (basic)
+            sentences = sum(1 for s in text.split('.') if s and not s.isspace())
+            
+            # Count paragraphs
+            paragraphs = sum(1 for p in text.split('\n') if p and not p.isspace())
         
         return {
             'characters': characters,
             'words': words,
             'sentences': sentences,
             'paragraphs': paragraphs
-        } 
\ No newline at end of file
+        } 
+
+@st.cache_resource
+def get_text_processor():
+    """Shared TextProcessor for the Streamlit server (one translator client across reruns and sessions)"""
+    return TextProcessor()
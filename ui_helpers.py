@@ -50,9 +50,18 @@ def display_translation_options(extracted_text, components):
     )
     if st.button("🌍 Translate"):
         with st.spinner("Translating..."):
-            translation_result = components['text_processor'].translate_text(
-                extracted_text, target_language
-            )
+            # Translate paragraphs as one batch so the paragraph breaks survive translation
+            paragraphs = [p for p in extracted_text.split('\n\n') if p.strip()]
+            if len(paragraphs) > 1:
+                translation_result = components['text_processor'].translate_batch(
+                    paragraphs, target_language
+                )
+                if translation_result['success']:
+                    translation_result['translated_text'] = '\n\n'.join(translation_result['translated_texts'])
+            else:
+                translation_result = components['text_processor'].translate_text(
+                    extracted_text, target_language
+                )
             if translation_result['success']:
                 st.success("Translation completed!")
                 st.text_area(
@@ -87,10 +96,20 @@ def display_tts_options(extracted_text, components):
     )
     if st.button("🔊 Generate Speech"):
         with st.spinner("Generating speech..."):
-            audio_data = components['text_processor'].text_to_speech(
-                extracted_text, tts_language
-            )
+            # Start playback with the first synthesized chunk, then swap in the full audio
+            player = st.empty()
+            chunks = []
+            try:
+                for chunk in components['text_processor'].text_to_speech_stream(extracted_text, tts_language):
+                    chunks.append(chunk)
+                    if len(chunks) == 1:
+                        player.audio(chunk, format='audio/mp3')
+            except Exception as e:
+                utils.create_error_message(f"Text-to-speech failed: {str(e)}")
+                return
+            audio_data = b''.join(chunks)
             if audio_data:
+                player.audio(audio_data, format='audio/mp3')
                 st.success("Speech generated successfully!")
                 timestamp = utils.create_timestamp().replace(":", "-")
                 filename = f"speech_{tts_language}_{timestamp}.mp3"
@@ -145,12 +164,13 @@ def display_text_analysis(extracted_text, ocr_results, components):
     with col2:
         st.write("**Cleaned Text:**")
         st.text_area("Cleaned", cleaned_text, height=100, disabled=True)
-    if ocr_results.get('confidence_scores'):
+    if len(ocr_results.get('confidence_scores', ())):
         st.write("**Confidence Analysis:**")
-        confidence_scores = ocr_results['confidence_scores']
-        avg_confidence = np.mean(confidence_scores)
-        min_confidence = np.min(confidence_scores)
-        max_confidence = np.max(confidence_scores)
+        # OCREngine already stores the scores as a uint8 array; asarray only converts legacy lists
+        confidence_scores = np.asarray(ocr_results['confidence_scores'])
+        avg_confidence = float(confidence_scores.mean())
+        min_confidence = float(confidence_scores.min())
+        max_confidence = float(confidence_scores.max())
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Average Confidence", f"{avg_confidence:.1f}%")
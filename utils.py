@@ -1,13 +1,21 @@
 import os
+import hashlib
 import cv2
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageSequence
 import streamlit as st
 from typing import Tuple, Optional, List
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 from datetime import datetime
 
+# Longest side (in pixels) of images sent to the browser
+DISPLAY_MAX_SIZE = 1200
+
+# Upload types accepted by validate_image_file
+ALLOWED_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp'})
+
+# Units for format_file_size, one per factor of 1024
+FILE_SIZE_UNITS = ("B", "KB", "MB", "GB")
+
 def validate_image_file(uploaded_file) -> bool:
     """
     Validate uploaded image file
@@ -22,10 +30,9 @@ def validate_image_file(uploaded_file) -> bool:
         return False
     
     # Check file extension
-    allowed_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp']
     file_extension = os.path.splitext(uploaded_file.name)[1].lower()
     
-    if file_extension not in allowed_extensions:
+    if file_extension not in ALLOWED_IMAGE_EXTENSIONS:
         return False
     
     # Check file size (max 10MB)
@@ -45,6 +52,12 @@ def load_image(uploaded_file) -> Optional[np.ndarray]:
         Image as numpy array or None if failed
     """
     try:
+        # Decode straight into an RGB array with OpenCV when it can read the format
+        if hasattr(uploaded_file, 'getvalue'):
+            image_array = _decode_with_cv2(uploaded_file.getvalue())
+            if image_array is not None:
+                return image_array
+        
         # Read image using PIL
         image = Image.open(uploaded_file)
         
@@ -61,16 +74,80 @@ def load_image(uploaded_file) -> Optional[np.ndarray]:
         st.error(f"Error loading image: {str(e)}")
         return None
 
-def resize_image(image: np.ndarray, max_size: int = 800) -> np.ndarray:
+def _decode_with_cv2(data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode encoded image bytes into an RGB array with OpenCV
+    
+    One decode straight into a contiguous array, with no PIL image or
+    copy in between. EXIF orientation is ignored, as with PIL.
+    
+    Args:
+        data: Encoded image file contents
+        
+    Returns:
+        RGB image array, or None if OpenCV cannot decode the format
+    """
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _decode_image_pages(file_key: str, _uploaded_file) -> List[np.ndarray]:
+    """Decode every page of an uploaded file, memoized on the upload's identity"""
+    # Image.open only parses the header, so the page count is cheap to read
+    image = Image.open(_uploaded_file)
+    
+    # Single-page files take OpenCV's decoder; PIL handles the rest (and multi-page files)
+    if getattr(image, 'n_frames', 1) == 1 and hasattr(_uploaded_file, 'getvalue'):
+        page = _decode_with_cv2(_uploaded_file.getvalue())
+        if page is not None:
+            return [page]
+    
+    pages = []
+    for frame in ImageSequence.Iterator(image):
+        if frame.mode != 'RGB':
+            frame = frame.convert('RGB')
+        pages.append(np.array(frame))
+    
+    return pages
+
+def load_image_pages(uploaded_file) -> List[np.ndarray]:
+    """
+    Load every page/frame of an uploaded image file
+    
+    The decoded pages are cached per upload, so reruns triggered by other
+    widgets do not decode the file again.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        
+    Returns:
+        List of pages as numpy arrays (empty if loading failed)
+    """
+    try:
+        file_key = getattr(uploaded_file, 'file_id', None)
+        if not file_key:
+            file_key = hashlib.blake2b(uploaded_file.getvalue(), digest_size=16).hexdigest()
+        
+        return _decode_image_pages(file_key, uploaded_file)
+        
+    except Exception as e:
+        st.error(f"Error loading image: {str(e)}")
+        return []
+
+def resize_image(image: np.ndarray, max_size: int = 800, out: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Resize image while maintaining aspect ratio
     
     Args:
         image: Input image
         max_size: Maximum dimension size
+        out: Optional preallocated array to resize into, reused across calls when it
+            already has the resized shape and dtype (a new array is allocated otherwise)
         
     Returns:
-        Resized image
+        Resized image (out itself when it was reused)
     """
     height, width = image.shape[:2]
     
@@ -85,50 +162,59 @@ def resize_image(image: np.ndarray, max_size: int = 800) -> np.ndarray:
         new_width = max_size
         new_height = int(height * max_size / width)
     
-    # Resize image
-    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    # Resize image (always a downscale here, which INTER_AREA handles best)
+    if out is not None and (out.shape[:2] != (new_height, new_width) or out.shape[2:] != image.shape[2:]
+                            or out.dtype != image.dtype):
+        out = None
+    resized = cv2.resize(image, (new_width, new_height), dst=out, interpolation=cv2.INTER_AREA)
     
     return resized
 
-def display_image_with_boxes(image: np.ndarray, ocr_results: List[dict], title: str = "OCR Results") -> None:
+def make_display_image(image: np.ndarray, max_size: int = DISPLAY_MAX_SIZE) -> np.ndarray:
+    """
+    Downscale an image for display in the browser
+    
+    st.image encodes and sends the array it is given on every rerun, so
+    large scans are shrunk to at most max_size pixels on the long side first.
+    
+    Args:
+        image: Input image
+        max_size: Maximum dimension size of the displayed image
+        
+    Returns:
+        Image no larger than max_size (the input itself if already small enough)
+    """
+    return resize_image(image, max_size)
+
+def display_image_with_boxes(image: np.ndarray, ocr_results: dict, title: str = "OCR Results") -> None:
     """
     Display image with bounding boxes around detected text
     
     Args:
         image: Input image
-        ocr_results: List of OCR results with bounding box information
-        title: Plot title
+        ocr_results: OCR result dictionary with per-word box_x/box_y/box_w/box_h/box_text arrays
+        title: Image caption
     """
     try:
-        # Create figure and axis
-        fig, ax = plt.subplots(1, figsize=(12, 8))
-        
-        # Display image
-        if len(image.shape) == 3:
-            ax.imshow(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        # Draw on an RGB copy so the boxes can be colored
+        if len(image.shape) == 2:
+            canvas = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
         else:
-            ax.imshow(image, cmap='gray')
+            canvas = image.copy()
         
-        # Draw bounding boxes
-        for result in ocr_results:
-            bbox = result.get('bbox', {})
-            if bbox:
-                x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
-                
-                # Create rectangle
-                rect = patches.Rectangle((x, y), w, h, linewidth=2, edgecolor='red', facecolor='none')
-                ax.add_patch(rect)
-                
-                # Add text label
-                ax.text(x, y-5, result.get('text', '')[:20], fontsize=8, color='red', 
-                       bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.7))
+        # Corner coordinates for all boxes at once
+        x0 = np.asarray(ocr_results['box_x'], dtype=np.int32)
+        y0 = np.asarray(ocr_results['box_y'], dtype=np.int32)
+        corners = np.stack([x0, y0, x0 + ocr_results['box_w'], y0 + ocr_results['box_h']], axis=1)
         
-        ax.set_title(title)
-        ax.axis('off')
+        # Draw bounding boxes and text labels
+        for (left, top, right, bottom), text in zip(corners.tolist(), ocr_results['box_text']):
+            cv2.rectangle(canvas, (left, top), (right, bottom), (255, 0, 0), 2)
+            cv2.putText(canvas, text[:20], (left, max(top - 5, 0)), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.4, (255, 0, 0), 1, cv2.LINE_AA)
         
         # Display in Streamlit
-        st.pyplot(fig)
-        plt.close(fig)
+        st.image(make_display_image(canvas), caption=title, use_column_width=True)
         
     except Exception as e:
         st.error(f"Error displaying image with boxes: {str(e)}")
@@ -142,27 +228,14 @@ def create_comparison_view(original_image: np.ndarray, processed_image: np.ndarr
         processed_image: Processed image
     """
     try:
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
-        
-        # Display original image
-        if len(original_image.shape) == 3:
-            ax1.imshow(cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB))
-        else:
-            ax1.imshow(original_image, cmap='gray')
-        ax1.set_title('Original Image')
-        ax1.axis('off')
+        col1, col2 = st.columns(2)
         
-        # Display processed image
-        if len(processed_image.shape) == 3:
-            ax2.imshow(cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB))
-        else:
-            ax2.imshow(processed_image, cmap='gray')
-        ax2.set_title('Processed Image')
-        ax2.axis('off')
+        # Display downscaled copies of both images
+        with col1:
+            st.image(make_display_image(original_image), caption='Original Image', use_column_width=True)
         
-        # Display in Streamlit
-        st.pyplot(fig)
-        plt.close(fig)
+        with col2:
+            st.image(make_display_image(processed_image), caption='Processed Image', use_column_width=True)
         
     except Exception as e:
         st.error(f"Error creating comparison view: {str(e)}")
@@ -180,13 +253,12 @@ def format_file_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0B"
     
-    size_names = ["B", "KB", "MB", "GB"]
+    # Every 10 bits of the size is one more factor of 1024
     i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    if size_bytes >= 1024:
+        i = min((int(size_bytes).bit_length() - 1) // 10, len(FILE_SIZE_UNITS) - 1)
     
-    return f"{size_bytes:.1f}{size_names[i]}"
+    return f"{size_bytes / (1 << (10 * i)):.1f}{FILE_SIZE_UNITS[i]}"
 
 def get_image_info(image: np.ndarray) -> dict:
     """
@@ -210,6 +282,22 @@ def get_image_info(image: np.ndarray) -> dict:
         'dtype': str(image.dtype)
     }
 
+def get_image_hash(image) -> str:
+    """
+    Compute a content hash of an image for use as a cache key
+    
+    Args:
+        image: Input image (numpy array or PIL Image)
+        
+    Returns:
+        Hex digest covering the pixel data, shape and dtype
+    """
+    image = np.ascontiguousarray(image)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{image.shape}{image.dtype}".encode())
+    hasher.update(memoryview(image).cast('B'))
+    return hasher.hexdigest()
+
 def create_download_button(data: bytes, filename: str, button_text: str) -> None:
     """
     Create a download button in Streamlit